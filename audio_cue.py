@@ -1,17 +1,35 @@
 # audio_cue.py
-import asyncio
 import os
-from playsound import playsound
+import asyncio
+import numpy as np
+import soundfile as sf
+import soxr
+from audio_engine import engine
 
 CHIME_PATH = os.path.join(os.path.dirname(__file__), "chime.mp3")
 
+# Decoded chime PCM, keyed by engine sample rate
+_chime_pcm: dict[int, bytes] = {}
+
+def _load_chime(samplerate: int) -> bytes:
+    """Decode chime.mp3 once into 16-bit mono PCM at the engine's rate."""
+    data, rate = sf.read(CHIME_PATH, dtype="float32", always_2d=True)
+    mono = data.mean(axis=1)
+    if rate != samplerate:
+        mono = soxr.resample(mono, rate, samplerate)
+    pcm = np.clip(mono, -1.0, 1.0)
+    return (pcm * 32767).astype("<i2").tobytes()
+
 async def play_chime():
     """
-    Play the chime.mp3 audio cue.
-    Uses asyncio.to_thread to avoid blocking the event loop.
+    Play the chime.mp3 audio cue through the shared output engine.
+    Decoding happens once, in a worker thread; later chimes only queue PCM.
     """
     if not os.path.exists(CHIME_PATH):
         raise FileNotFoundError(f"Chime file not found: {CHIME_PATH}")
+    pcm = _chime_pcm.get(engine.samplerate)
+    if pcm is None:
+        pcm = await asyncio.to_thread(_load_chime, engine.samplerate)
+        _chime_pcm[engine.samplerate] = pcm
     print("[CHIME] Playing audio cue…")
-    # Run playsound in a thread so we don’t block the asyncio loop
-    await asyncio.to_thread(playsound, CHIME_PATH)
\ No newline at end of file
+    await engine.play(pcm, label="chime").wait()
@@ -0,0 +1,214 @@
+# audio_engine.py
+"""
+Long-lived audio output engine.
+One sounddevice output stream stays open for the whole session and plays a
+shared queue of clips (narration, prompts, chime), so no utterance pays for
+spawning a player or opening the device.
+"""
+import time
+import asyncio
+import logging
+import threading
+from collections import deque
+import numpy as np
+
+class Playback:
+    """Handle for one queued clip. Audio may keep arriving after it starts playing."""
+    def __init__(self, engine: "AudioEngine", label: str = ""):
+        self.engine = engine
+        self.label = label
+        self._buffer = bytearray()
+        self._pending = b""     # odd trailing byte waiting for its pair
+        self._closed = False    # no more audio will be fed
+        self._cancelled = False
+        self.first_audio: float | None = None  # perf_counter() when audio first arrived
+        self._loop = asyncio.get_running_loop()
+        self._done = self._loop.create_future()
+
+    def feed(self, data: bytes):
+        """Append 16-bit PCM bytes; safe to call from any thread."""
+        data = self._pending + data
+        cut = len(data) - len(data) % 2
+        self._pending = data[cut:]
+        with self.engine._lock:
+            if not self._cancelled:
+                self._buffer += data[:cut]
+                if self.first_audio is None and cut:
+                    self.first_audio = time.perf_counter()
+
+    def close(self):
+        """Mark the clip complete; it finishes once its buffer drains."""
+        with self.engine._lock:
+            self._closed = True
+        self.engine._reap()
+
+    def cancel(self):
+        """Stop the clip immediately, even mid-playback."""
+        self.engine._cancel(self)
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled
+
+    def _finish(self):
+        def _set():
+            if not self._done.done():
+                self._done.set_result(None)
+        try:
+            self._loop.call_soon_threadsafe(_set)
+        except RuntimeError:
+            pass  # loop already closed
+
+    async def wait(self):
+        """Wait until the clip has been handed to the device (or cancelled)."""
+        await asyncio.shield(self._done)
+
+class AudioEngine:
+    def __init__(self, samplerate: int = 24000, blocksize: int = 512,
+                 latency: str | float = "low", device=None):
+        self.samplerate = samplerate
+        self.blocksize = blocksize
+        self.latency = latency
+        self.device = device
+        self._stream = None
+        self._lock = threading.Lock()
+        self._queue: deque[Playback] = deque()
+        self.underruns = 0
+        self.gain = 1.0  # software volume applied in the callback
+        # time.monotonic() at which the last audio written leaves the speakers
+        self.audible_until = 0.0
+
+    def configure(self, **settings):
+        """Change stream settings; takes effect on the next start()."""
+        for name, value in settings.items():
+            if not hasattr(self, name):
+                raise ValueError(f"Unknown audio setting: {name}")
+            setattr(self, name, value)
+        if self._stream is not None:
+            self.close()
+
+    def start(self):
+        """Open the output stream once; later calls are no-ops."""
+        if self._stream is not None:
+            return
+        import sounddevice as sd  # loads PortAudio; deferred until a stream opens
+        self._stream = sd.RawOutputStream(
+            samplerate=self.samplerate,
+            blocksize=self.blocksize,
+            channels=1,
+            dtype="int16",
+            latency=self.latency,
+            device=self.device,
+            callback=self._callback,
+        )
+        self._stream.start()
+        logging.info(
+            f"[AUDIO] Output open: {self.samplerate} Hz, blocksize={self.blocksize}, "
+            f"device latency={self.device_latency * 1000:.1f} ms"
+        )
+
+    @property
+    def device_latency(self) -> float:
+        """Output latency reported by PortAudio, in seconds."""
+        return self._stream.latency if self._stream is not None else 0.0
+
+    def enqueue(self, label: str = "") -> Playback:
+        """Queue an open clip; feed() it and close() it when done."""
+        self.start()
+        playback = Playback(self, label)
+        with self._lock:
+            self._queue.append(playback)
+        return playback
+
+    def play(self, audio: bytes, label: str = "") -> Playback:
+        """Queue a complete clip."""
+        playback = self.enqueue(label)
+        playback.feed(audio)
+        playback.close()
+        return playback
+
+    def stop_all(self):
+        """Cancel everything queued or playing."""
+        with self._lock:
+            queued = list(self._queue)
+        for playback in queued:
+            playback.cancel()
+
+    def _cancel(self, playback: Playback):
+        with self._lock:
+            playback._cancelled = True
+            playback._buffer.clear()
+            try:
+                self._queue.remove(playback)
+            except ValueError:
+                pass
+        playback._finish()
+
+    def _reap(self):
+        """Finish closed clips with nothing left to play (e.g. empty streams)."""
+        finished = []
+        with self._lock:
+            for playback in list(self._queue):
+                if playback._closed and not playback._buffer:
+                    self._queue.remove(playback)
+                    finished.append(playback)
+                else:
+                    break
+        for playback in finished:
+            playback._finish()
+
+    def _callback(self, outdata, frames, time_info, status):
+        need = len(outdata)
+        out = bytearray()
+        finished = []
+        with self._lock:
+            while len(out) < need and self._queue:
+                playback = self._queue[0]
+                take = playback._buffer[:need - len(out)]
+                del playback._buffer[:len(take)]
+                out += take
+                if playback._buffer:
+                    continue
+                if playback._closed:
+                    self._queue.popleft()
+                    finished.append(playback)
+                else:
+                    # Still downloading: keep order and fill with silence
+                    self.underruns += 1
+                    break
+        if out:
+            self.audible_until = (time.monotonic() + len(out) / 2 / self.samplerate
+                                  + self.device_latency)
+        if len(out) < need:
+            out += bytes(need - len(out))
+        if self.gain != 1.0:
+            samples = np.frombuffer(out, dtype="<i2").astype(np.float32) * self.gain
+            out = np.clip(samples, -32768, 32767).astype("<i2").tobytes()
+        outdata[:] = bytes(out)
+        for playback in finished:
+            playback._finish()
+
+    def louder(self, step: float = 1.25, max_gain: float = 4.0) -> float:
+        """Raise the output gain; takes effect on the next audio block."""
+        self.gain = min(max_gain, self.gain * step)
+        return self.gain
+
+    def stats(self) -> dict:
+        return {
+            "gain": round(self.gain, 2),
+            "samplerate": self.samplerate,
+            "blocksize": self.blocksize,
+            "device_latency_ms": round(self.device_latency * 1000, 1),
+            "queued": len(self._queue),
+            "underruns": self.underruns,
+        }
+
+    def close(self):
+        self.stop_all()
+        if self._stream is not None:
+            self._stream.stop()
+            self._stream.close()
+            self._stream = None
+
+# Global instance shared by narration, prompts and the chime
+engine = AudioEngine()
@@ -1,28 +1,40 @@
 # config_loader.py
-from dotenv import load_dotenv
 import os
 import json
-
-# Load .env variables
-load_dotenv()
-
-# Environment variables
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-ELEVENLABS_API_KEY = os.getenv("ELEVENLABS_API_KEY")
-
-# Google Slides URL from config.json
-with open("config.json", "r") as f:
-    _cfg = json.load(f)
-SLIDES_URL = _cfg.get("slides_url")
+import functools
+from dotenv import load_dotenv
 
 # Path to Google credentials (constant)
 GOOGLE_CREDENTIALS_PATH = "google_credentials.json"
 
-# Basic sanity check (will raise if any missing)
-_missing = [k for k,v in {
-    "OPENAI_API_KEY": OPENAI_API_KEY,
-    "ELEVENLABS_API_KEY": ELEVENLABS_API_KEY,
-    "SLIDES_URL": SLIDES_URL,
-}.items() if not v]
-if _missing:
-    raise RuntimeError(f"Missing configuration for: {', '.join(_missing)}") 
\ No newline at end of file
+@functools.cache
+def load_env() -> bool:
+    """Load .env variables once per process; every service calls this."""
+    return load_dotenv()
+
+@functools.cache
+def load_settings() -> dict:
+    """
+    API keys from the environment and the Slides URL from config.json.
+    Raises RuntimeError if any of them is missing.
+    """
+    load_env()
+    with open("config.json", "r") as f:
+        cfg = json.load(f)
+    settings = {
+        "OPENAI_API_KEY": os.getenv("OPENAI_API_KEY"),
+        "ELEVENLABS_API_KEY": os.getenv("ELEVENLABS_API_KEY"),
+        "SLIDES_URL": cfg.get("slides_url"),
+    }
+    # Basic sanity check (will raise if any missing)
+    missing = [k for k, v in settings.items() if not v]
+    if missing:
+        raise RuntimeError(f"Missing configuration for: {', '.join(missing)}")
+    return settings
+
+def __getattr__(name):
+    # OPENAI_API_KEY, ELEVENLABS_API_KEY and SLIDES_URL are read on first access,
+    # so importing this module never touches the disk
+    if name in ("OPENAI_API_KEY", "ELEVENLABS_API_KEY", "SLIDES_URL"):
+        return load_settings()[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
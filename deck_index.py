@@ -0,0 +1,156 @@
+# deck_index.py
+"""
+Structured per-slide content: title, body paragraphs (shapes, tables and
+grouped elements on the slide page) and speaker notes. Every page element is
+visited once and text is gathered into lists and joined at the end, so
+building the index is linear in the size of the deck.
+"""
+import re
+import math
+from typing import NamedTuple
+from collections import Counter, defaultdict
+
+TITLE_PLACEHOLDERS = ("TITLE", "CENTERED_TITLE")
+
+# Partial-response mask for one page element (one explicit level of grouping;
+# deeper groups come back whole)
+_TEXT = "text/textElements/textRun/content"
+_ELEMENT = f"objectId,shape(placeholder/type,{_TEXT}),table/tableRows/tableCells/{_TEXT}"
+ELEMENT_FIELDS = f"{_ELEMENT},elementGroup/children({_ELEMENT},elementGroup)"
+
+_WORD = re.compile(r"\w+")
+
+class SlideRecord(NamedTuple):
+    index: int
+    object_id: str | None
+    title: str
+    paragraphs: tuple[str, ...]   # slide body, in reading order; one per table row
+    notes: str                    # speaker notes, whitespace-normalized (narration text)
+
+    @property
+    def body(self) -> str:
+        return "\n".join(self.paragraphs)
+
+    @property
+    def context(self) -> str:
+        """Everything on the slide, as Q&A context."""
+        parts = [self.title] if self.title else []
+        if self.paragraphs:
+            parts.append(self.body)
+        if self.notes:
+            parts.append(f"Speaker notes:\n{self.notes}")
+        return "\n\n".join(parts)
+
+def walk_elements(elements: list[dict]):
+    """Yield page elements in reading order, descending into groups."""
+    stack = list(reversed(elements))
+    while stack:
+        element = stack.pop()
+        group = element.get("elementGroup")
+        if group is not None:
+            stack.extend(reversed(group.get("children", [])))
+        else:
+            yield element
+
+def text_paragraphs(text: dict, out: list[str]):
+    """Append the non-empty, whitespace-normalized paragraphs of a TextContent to `out`."""
+    current = []
+    for text_element in text.get("textElements", ()):
+        run = text_element.get("textRun")
+        if run is None:
+            continue
+        lines = run.get("content", "").split("\n")
+        current.append(lines[0])
+        for line in lines[1:]:
+            paragraph = " ".join("".join(current).split())
+            if paragraph:
+                out.append(paragraph)
+            current = [line]
+    paragraph = " ".join("".join(current).split())
+    if paragraph:
+        out.append(paragraph)
+
+def page_content(elements: list[dict]) -> tuple[str, list[str]]:
+    """(title, body paragraphs) of a slide page."""
+    title = ""
+    paragraphs = []
+    for element in walk_elements(elements):
+        shape = element.get("shape")
+        if shape is not None and "text" in shape:
+            if not title and shape.get("placeholder", {}).get("type") in TITLE_PLACEHOLDERS:
+                parts = []
+                text_paragraphs(shape["text"], parts)
+                title = " ".join(parts)
+            else:
+                text_paragraphs(shape["text"], paragraphs)
+        table = element.get("table")
+        if table is not None:
+            for row in table.get("tableRows", []):
+                cells = []
+                for cell in row.get("tableCells", []):
+                    parts = []
+                    text_paragraphs(cell.get("text", {}), parts)
+                    cells.append(" ".join(parts))
+                if any(cells):
+                    paragraphs.append(" | ".join(cells))
+    return title, paragraphs
+
+def slide_notes(slide: dict) -> str:
+    """Speaker-notes text of one slide, whitespace-normalized."""
+    notes_page = slide.get("slideProperties", {}).get("notesPage", {})
+    elements = notes_page.get("pageElements", [])
+    speaker_id = notes_page.get("notesProperties", {}).get("speakerNotesObjectId")
+    if speaker_id:
+        elements = [e for e in elements if e.get("objectId") == speaker_id] or elements
+    parts = []
+    for element in walk_elements(elements):
+        shape = element.get("shape")
+        if shape is not None and "text" in shape:
+            text_paragraphs(shape["text"], parts)
+    return " ".join(parts)
+
+def build_record(index: int, slide: dict) -> SlideRecord:
+    title, paragraphs = page_content(slide.get("pageElements", []))
+    return SlideRecord(index, slide.get("objectId"), title, tuple(paragraphs), slide_notes(slide))
+
+class DeckIndex:
+    """Read-only view over a deck's SlideRecords; rebuilt, never mutated, on sync."""
+    def __init__(self, records: list[SlideRecord] = ()):
+        self.records = list(records)
+        self.by_index = {r.index: r for r in self.records}
+        self.by_object_id = {r.object_id: r for r in self.records if r.object_id}
+        self.notes_by_slide = {r.index: r.notes for r in self.records if r.notes}
+        # Text held by the records (str overhead and containers not counted)
+        self.text_bytes = sum(len(r.title) + len(r.notes) + sum(map(len, r.paragraphs))
+                              for r in self.records)
+        self._postings = None   # word → {slide index: count}, built on first search
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def get(self, index: int) -> SlideRecord | None:
+        return self.by_index.get(index)
+
+    def _build_postings(self):
+        postings = defaultdict(dict)
+        for r in self.records:
+            # Title words count double
+            words = Counter(_WORD.findall(f"{r.title} {r.title} {r.body} {r.notes}".lower()))
+            for word, count in words.items():
+                postings[word][r.index] = count
+        self._postings = postings
+
+    def search(self, query: str, limit: int = 5) -> list[tuple[SlideRecord, float]]:
+        """Slides ranked by tf-idf overlap with `query`, best first."""
+        if self._postings is None:
+            self._build_postings()
+        scores = defaultdict(float)
+        for word in set(_WORD.findall(query.lower())):
+            hits = self._postings.get(word)
+            if not hits:
+                continue
+            idf = math.log(1 + len(self.records) / len(hits))
+            for index, count in hits.items():
+                scores[index] += (1 + math.log(count)) * idf
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:limit]
+        return [(self.by_index[index], score) for index, score in ranked]
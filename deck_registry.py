@@ -0,0 +1,168 @@
+# deck_registry.py
+"""
+Loaded decks, keyed by presentation ID. Each deck has its own SlidesService
+(objectId→index mapping, current slide, slide records) so several
+presentations can be served from one process. Decks load concurrently and
+at most once at a time per ID; the least recently used ones are unloaded
+when the registry goes over its deck count or memory cap, or sit idle too
+long. Their snapshots stay on disk, so reloading is fast.
+"""
+import os
+import time
+import asyncio
+import logging
+import threading
+from collections import OrderedDict
+from slides_service import SlidesService, SCOPES, presentation_id_from
+from google_token import ServiceAccountToken
+
+class DeckRegistry:
+    def __init__(self, creds_path: str, snapshot_dir: str | None = ".deck_cache",
+                 max_decks: int = 4, max_bytes: int = 64 * 1024 * 1024,
+                 idle_ttl: float | None = 4 * 3600.0, sync_interval: float | None = 15.0,
+                 negative_ttl: float = 10.0):
+        self.creds_path = creds_path
+        self.snapshot_dir = snapshot_dir
+        self.max_decks = max_decks
+        self.max_bytes = max_bytes
+        self.idle_ttl = idle_ttl
+        self.sync_interval = sync_interval
+        self.negative_ttl = negative_ttl
+        # presentation ID → (deck, background sync task), least recently used first
+        self._decks: OrderedDict[str, tuple[SlidesService, asyncio.Task | None]] = OrderedDict()
+        self._last_used: dict[str, float] = {}
+        self._loading: dict[str, asyncio.Task] = {}
+        self._listeners = []
+        self._auth = None
+        # Concurrent loads build the token from worker threads
+        self._auth_lock = threading.Lock()
+        self.loads = 0
+        self.unloads = 0
+
+    @property
+    def auth(self) -> ServiceAccountToken:
+        """One service-account token shared by every deck."""
+        with self._auth_lock:
+            if self._auth is None:
+                cache_path = os.path.join(self.snapshot_dir, "token.json") if self.snapshot_dir else None
+                self._auth = ServiceAccountToken(self.creds_path, SCOPES, cache_path=cache_path)
+            return self._auth
+
+    async def keep_token_fresh(self):
+        """Background task: refresh the shared token before it expires."""
+        auth = await asyncio.to_thread(lambda: self.auth)
+        await auth.refresh_forever()
+
+    def on_change(self, callback):
+        """Call `callback(deck, list[SlideChange])` when a loaded deck syncs changes."""
+        self._listeners.append(callback)
+
+    def __contains__(self, presentation_id: str) -> bool:
+        return presentation_id in self._decks
+
+    def peek(self, presentation_id: str) -> SlidesService | None:
+        """The loaded deck for `presentation_id`, without loading or touching it."""
+        entry = self._decks.get(presentation_id)
+        return entry[0] if entry else None
+
+    async def get(self, slides_url: str) -> SlidesService:
+        """
+        Return the deck for a Slides URL or presentation ID, loading it
+        (snapshot first, then the API) if needed. Concurrent calls for the
+        same deck share one load.
+        """
+        presentation_id = presentation_id_from(slides_url)
+        entry = self._decks.get(presentation_id)
+        if entry is not None:
+            self._touch(presentation_id)
+            self._evict(keep=presentation_id)
+            return entry[0]
+
+        task = self._loading.get(presentation_id)
+        if task is None:
+            task = asyncio.create_task(self._load(presentation_id))
+            self._loading[presentation_id] = task
+            task.add_done_callback(lambda _: self._loading.pop(presentation_id, None))
+        # Shield so one cancelled caller does not abort a load others wait on
+        return await asyncio.shield(task)
+
+    async def preload(self, slides_urls: list[str]) -> list[SlidesService | BaseException]:
+        """Load several decks concurrently; failures are returned, not raised."""
+        return await asyncio.gather(*(self.get(url) for url in slides_urls),
+                                    return_exceptions=True)
+
+    async def _load(self, presentation_id: str) -> SlidesService:
+        start = time.perf_counter()
+        # The shared token is built (and possibly restored from disk) off the loop
+        auth = await asyncio.to_thread(lambda: self.auth)
+        deck = SlidesService(self.creds_path, presentation_id,
+                             snapshot_dir=self.snapshot_dir, auth=auth,
+                             negative_ttl=self.negative_ttl)
+        from_snapshot = await asyncio.to_thread(deck.load_snapshot)
+        if not from_snapshot:
+            await deck.load()
+        deck.on_change(lambda changes: self._emit(deck, changes))
+
+        sync = None
+        if self.sync_interval or from_snapshot:
+            sync = asyncio.create_task(deck.sync_forever(self.sync_interval, immediate=from_snapshot))
+        self._decks[presentation_id] = (deck, sync)
+        self._touch(presentation_id)
+        self.loads += 1
+        logging.info(f"[DECKS] Loaded {presentation_id} ({len(deck.index)} slides, "
+                     f"{'snapshot' if from_snapshot else 'API'}) in "
+                     f"{(time.perf_counter() - start) * 1000:.0f} ms")
+        self._evict(keep=presentation_id)
+        return deck
+
+    def _emit(self, deck: SlidesService, changes):
+        for callback in self._listeners:
+            try:
+                callback(deck, changes)
+            except Exception as e:
+                logging.error(f"[DECKS] Change listener failed: {e}")
+
+    def _touch(self, presentation_id: str):
+        self._decks.move_to_end(presentation_id)
+        self._last_used[presentation_id] = time.monotonic()
+
+    def memory_bytes(self) -> int:
+        return sum(deck.memory_bytes() for deck, _ in self._decks.values())
+
+    def _evict(self, keep: str | None = None):
+        """Unload idle decks, then least recently used ones while over either cap."""
+        now = time.monotonic()
+        if self.idle_ttl is not None:
+            for presentation_id in list(self._decks):
+                if presentation_id != keep and now - self._last_used[presentation_id] > self.idle_ttl:
+                    self.unload(presentation_id)
+        while len(self._decks) > 1 and (len(self._decks) > self.max_decks
+                                        or self.memory_bytes() > self.max_bytes):
+            oldest = next(iter(self._decks))
+            if oldest == keep:
+                break
+            self.unload(oldest)
+
+    def unload(self, presentation_id: str):
+        """Drop a deck from memory and stop its sync (its snapshot stays on disk)."""
+        entry = self._decks.pop(presentation_id, None)
+        self._last_used.pop(presentation_id, None)
+        if entry is None:
+            return
+        if entry[1] is not None:
+            entry[1].cancel()
+        self.unloads += 1
+        logging.info(f"[DECKS] Unloaded {presentation_id}")
+
+    def close(self):
+        for presentation_id in list(self._decks):
+            self.unload(presentation_id)
+
+    def stats(self) -> dict:
+        return {
+            "decks": list(self._decks),
+            "loading": list(self._loading),
+            "memory_bytes": self.memory_bytes(),
+            "loads": self.loads,
+            "unloads": self.unloads,
+        }
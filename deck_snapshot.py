@@ -0,0 +1,63 @@
+# deck_snapshot.py
+"""
+On-disk snapshot of a parsed deck (slide records, revisionId), keyed by
+presentation ID. Lets a restart serve notes immediately, before (or without)
+reaching the Slides API.
+"""
+import os
+import json
+import gzip
+import time
+import logging
+
+SNAPSHOT_VERSION = 2
+
+def snapshot_path(cache_dir: str, presentation_id: str) -> str:
+    return os.path.join(cache_dir, f"{presentation_id}.json.gz")
+
+def save_snapshot(cache_dir: str, presentation_id: str, revision_id: str | None,
+                  slides: list[tuple]) -> bool:
+    """
+    Write `slides` — (objectId, fingerprint, title, paragraphs, notes) in deck
+    order — atomically.
+    Returns False (after logging) if the snapshot could not be written.
+    """
+    data = {
+        "version": SNAPSHOT_VERSION,
+        "presentation_id": presentation_id,
+        "revision_id": revision_id,
+        "saved_at": time.time(),
+        "slides": [list(s) for s in slides],
+    }
+    path = snapshot_path(cache_dir, presentation_id)
+    tmp = f"{path}.tmp"
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        with gzip.open(tmp, "wt", encoding="utf-8") as f:
+            json.dump(data, f, separators=(",", ":"))
+        os.replace(tmp, path)
+    except OSError as e:
+        logging.warning(f"[SNAPSHOT] Could not write {path}: {e}")
+        return False
+    return True
+
+def load_snapshot(cache_dir: str, presentation_id: str) -> dict | None:
+    """
+    Read the snapshot for `presentation_id`.
+
+    Returns:
+        dict: with "revision_id", "saved_at" and "slides"
+        None: if there is no usable snapshot
+    """
+    path = snapshot_path(cache_dir, presentation_id)
+    try:
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        logging.warning(f"[SNAPSHOT] Ignoring unreadable {path}: {e}")
+        return None
+    if data.get("version") != SNAPSHOT_VERSION or data.get("presentation_id") != presentation_id:
+        return None
+    return data
@@ -0,0 +1,110 @@
+# google_token.py
+"""
+Service-account access token that survives restarts and is refreshed ahead of
+expiry, so API calls never stop to exchange a JWT for a token.
+"""
+import os
+import json
+import asyncio
+import logging
+import datetime
+import threading
+
+def _utcnow() -> datetime.datetime:
+    # google-auth keeps expiry as a naive UTC datetime
+    return datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+
+class ServiceAccountToken:
+    def __init__(self, creds_path: str, scopes: list[str],
+                 cache_path: str | None = None, refresh_margin: float = 300.0):
+        from google.oauth2 import service_account
+        self.credentials = service_account.Credentials.from_service_account_file(
+            creds_path, scopes=scopes
+        )
+        self.scopes = list(scopes)
+        self.cache_path = cache_path
+        # Refresh this many seconds before expiry (google-auth itself only
+        # refreshes inside the last few minutes, on the request path)
+        self.refresh_margin = refresh_margin
+        self.refreshes = 0
+        # One token is shared by every deck's worker threads and the
+        # background refresher; only one of them may mint a new one
+        self._lock = threading.RLock()
+        self.restored = self._restore()
+
+    def seconds_left(self) -> float:
+        """Seconds until the current token expires (0 if there is none)."""
+        if not self.credentials.token or self.credentials.expiry is None:
+            return 0.0
+        return max(0.0, (self.credentials.expiry - _utcnow()).total_seconds())
+
+    def _restore(self) -> bool:
+        """Reuse a cached token for the same account and scopes if it is still fresh."""
+        if not self.cache_path:
+            return False
+        try:
+            with open(self.cache_path) as f:
+                data = json.load(f)
+            if (data.get("client_email") != self.credentials.service_account_email
+                    or data.get("scopes") != self.scopes):
+                return False
+            expiry = datetime.datetime.fromisoformat(data["expiry"])
+        except (OSError, ValueError, KeyError):
+            return False
+        if (expiry - _utcnow()).total_seconds() <= self.refresh_margin:
+            return False
+        self.credentials.token = data["token"]
+        self.credentials.expiry = expiry
+        logging.info(f"[AUTH] Reusing cached token ({self.seconds_left() / 60:.0f} min left)")
+        return True
+
+    def _save(self):
+        if not self.cache_path:
+            return
+        data = {
+            "client_email": self.credentials.service_account_email,
+            "scopes": self.scopes,
+            "token": self.credentials.token,
+            "expiry": self.credentials.expiry.isoformat(),
+        }
+        tmp = f"{self.cache_path}.tmp"
+        try:
+            os.makedirs(os.path.dirname(self.cache_path) or ".", exist_ok=True)
+            # Owner-only: this is a live bearer token
+            fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, "w") as f:
+                json.dump(data, f)
+            os.replace(tmp, self.cache_path)
+        except OSError as e:
+            logging.warning(f"[AUTH] Could not cache token: {e}")
+
+    def refresh(self):
+        """Mint a new access token (blocking) and cache it."""
+        from google.auth.transport.requests import Request
+        with self._lock:
+            self.credentials.refresh(Request())
+            self.refreshes += 1
+            self._save()
+        logging.info(f"[AUTH] Token refreshed ({self.seconds_left() / 60:.0f} min left)")
+
+    def ensure_fresh(self):
+        """
+        Refresh now if the token is missing or inside the refresh margin
+        (blocking). Concurrent callers wait for a single refresh.
+        """
+        if self.seconds_left() > self.refresh_margin:
+            return
+        with self._lock:
+            # Another thread may have refreshed while we waited
+            if self.seconds_left() <= self.refresh_margin:
+                self.refresh()
+
+    async def refresh_forever(self, retry: float = 30.0):
+        """Background task: keep the token outside the refresh margin."""
+        while True:
+            await asyncio.sleep(max(0.0, self.seconds_left() - self.refresh_margin))
+            try:
+                await asyncio.to_thread(self.ensure_fresh)
+            except Exception as e:
+                logging.warning(f"[AUTH] Token refresh failed: {e}")
+                await asyncio.sleep(retry)
@@ -0,0 +1,35 @@
+# http_pool.py
+"""
+Shared keep-alive HTTP connection pool for the provider clients.
+OpenAI (chat + transcription) and ElevenLabs reuse the same httpx.AsyncClient,
+so repeated calls skip the TCP/TLS handshake.
+"""
+import threading
+import httpx
+
+_client: httpx.AsyncClient | None = None
+# Services are constructed concurrently in worker threads at startup
+_lock = threading.Lock()
+
+def get_async_client() -> httpx.AsyncClient:
+    """Return the process-wide pooled client, creating it on first use."""
+    global _client
+    with _lock:
+        if _client is None or _client.is_closed:
+            _client = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=20,
+                    max_keepalive_connections=10,
+                    keepalive_expiry=120.0,
+                ),
+                # Per-call timeouts are set by each service; this is the fallback
+                timeout=httpx.Timeout(60.0, connect=5.0),
+            )
+        return _client
+
+async def close():
+    """Close the pooled client (call once on shutdown)."""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
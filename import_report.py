@@ -0,0 +1,91 @@
+# import_report.py
+"""
+Cold-import timing for the entry points, from `python -X importtime` run in a
+fresh interpreter.
+
+    python import_report.py                  # every entry point, top 10 imports each
+    python import_report.py main --top 25
+    python import_report.py --check          # exit 1 if any entry point is over budget
+"""
+import os
+import re
+import sys
+import argparse
+import subprocess
+
+ENTRY_POINTS = ("main", "qa_service", "slide_detector")
+
+# Cold-import budgets in milliseconds (best of a few runs). Heavy SDKs
+# (openai, elevenlabs, googleapiclient, sounddevice) must load on first use.
+BUDGET_MS = {
+    "main": 800,
+    "qa_service": 500,
+    "slide_detector": 500,
+}
+
+_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+def measure(module: str) -> list[tuple[str, int, int, int]]:
+    """
+    Import `module` in a fresh interpreter with -X importtime.
+
+    Returns:
+        (name, self µs, cumulative µs, nesting depth) for every import, in load order
+    """
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{proc.stderr[-2000:]}")
+    rows = []
+    for line in proc.stderr.splitlines():
+        m = _LINE.match(line)
+        if m:
+            rows.append((m.group(4), int(m.group(1)), int(m.group(2)), len(m.group(3)) // 2))
+    return rows
+
+def cold_import_ms(module: str, repeat: int = 3) -> float:
+    """Best-of-`repeat` cumulative import time of `module`, in milliseconds."""
+    best = None
+    for _ in range(repeat):
+        total = next(cum for name, _, cum, depth in reversed(measure(module))
+                     if name == module and depth == 0)
+        best = total if best is None else min(best, total)
+    return best / 1000
+
+def report(module: str, top: int = 10) -> str:
+    """Total plus the `top` slowest direct and transitive imports by cumulative time."""
+    rows = measure(module)
+    total = next(cum for name, _, cum, depth in reversed(rows) if name == module and depth == 0)
+    lines = [f"{module}: {total / 1000:.0f} ms"]
+    others = [r for r in rows if r[0] != module]
+    for name, own, cum, depth in sorted(others, key=lambda r: r[2], reverse=True)[:top]:
+        lines.append(f"  {cum / 1000:8.1f} ms  (self {own / 1000:6.1f})  {'  ' * depth}{name}")
+    return "\n".join(lines)
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("modules", nargs="*", default=list(ENTRY_POINTS))
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--check", action="store_true",
+                        help="only compare cold import times against BUDGET_MS")
+    args = parser.parse_args(argv)
+
+    if not args.check:
+        for module in args.modules:
+            print(report(module, args.top))
+        return 0
+
+    over = 0
+    for module in args.modules:
+        ms = cold_import_ms(module)
+        budget = BUDGET_MS.get(module)
+        status = "ok" if budget is None or ms <= budget else "OVER BUDGET"
+        over += status != "ok"
+        print(f"{module:<16} {ms:7.0f} ms  (budget {budget} ms)  {status}")
+    return 1 if over else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,123 @@
+# intent_router.py
+"""
+Local intent router for short spoken replies.
+Declines ("nah I'm good") and voice commands ("repeat that", "next slide",
+"louder") are recognized by fuzzy token matching against a compiled phrase
+table, so they are handled in milliseconds without a GPT-4 call. Every word of
+the utterance (fillers and courtesy words aside) must match a word of the
+phrase, and negations in the phrase must be spoken, so "is that all" or "what
+did you say about costs" still reach the LLM as questions while "sorry can
+you repeat that" does not.
+"""
+from difflib import SequenceMatcher
+from functools import lru_cache
+from typing import NamedTuple
+from qa_cache import normalize_question, question_terms
+
+DECLINE = "decline"
+REPEAT = "repeat"
+NEXT = "next"
+BACK = "back"
+LOUDER = "louder"
+SLOWER = "slower"
+
+PHRASES = {
+    DECLINE: [
+        "no", "nope", "nah", "none", "nothing", "skip", "no questions",
+        "no thank you", "no thanks", "not now", "nah i'm good", "i'm good",
+        "i'm fine", "all good", "that's all", "that's it", "no i'm good",
+        "nothing from me", "no more questions", "we're good", "nope thanks",
+        "no that's all", "no that is all", "nope i'm good",
+        "i don't have any questions", "no i don't have any questions",
+    ],
+    REPEAT: [
+        "repeat that", "repeat", "say that again", "can you repeat that",
+        "could you repeat that", "come again", "pardon", "what did you say",
+        "one more time",
+    ],
+    NEXT: [
+        "next slide", "next", "go on", "move on", "continue", "keep going",
+        "go to the next slide",
+    ],
+    BACK: [
+        "go back", "back", "previous slide", "last slide", "previous",
+        "go to the previous slide", "back one slide",
+    ],
+    LOUDER: [
+        "louder", "speak up", "volume up", "turn it up", "i can't hear you",
+        "can't hear you", "a bit louder",
+    ],
+    SLOWER: [
+        "slower", "slow down", "speak slower", "too fast", "a bit slower",
+        "talk slower", "slow down a bit",
+    ],
+}
+
+# Politeness and preamble around a command ("sorry, could you ... a bit")
+_COURTESY = {"thanks", "thank", "sorry", "can", "could", "would", "you",
+             "a", "bit", "little"}
+
+def _content_words(text: str) -> tuple[str, ...]:
+    return tuple(w for w in text.split() if w not in _COURTESY)
+
+class Intent(NamedTuple):
+    name: str
+    score: float
+    phrase: str
+
+@lru_cache(maxsize=4096)
+def _token_similarity(a: str, b: str) -> float:
+    if a == b:
+        return 1.0
+    return SequenceMatcher(None, a, b).ratio()
+
+def _best(token: str, others: tuple[str, ...], min_similarity: float) -> float:
+    best = max((_token_similarity(token, other) for other in others), default=0.0)
+    return best if best >= min_similarity else 0.0
+
+class IntentRouter:
+    def __init__(self, phrases: dict[str, list[str]] | None = None,
+                 threshold: float = 0.8, min_similarity: float = 0.75,
+                 max_tokens: int = 8):
+        self.threshold = threshold
+        self.min_similarity = min_similarity
+        # Long utterances are questions, not commands
+        self.max_tokens = max_tokens
+        self._table = [
+            (intent, phrase, _content_words(norm), question_terms(norm)[1])
+            for intent, options in (phrases or PHRASES).items()
+            for phrase in options
+            for norm in [normalize_question(phrase)]
+        ]
+
+    def _score(self, words: tuple[str, ...], tokens: tuple[str, ...]) -> float:
+        """
+        F1 of fuzzy token overlap between phrase and utterance, or 0.0 if
+        any utterance word has no counterpart in the phrase.
+        """
+        matched = [_best(w, tokens, self.min_similarity) for w in words]
+        if not all(matched):
+            return 0.0
+        recall = sum(_best(t, words, self.min_similarity) for t in tokens) / len(tokens)
+        precision = sum(matched) / len(words)
+        if not recall:
+            return 0.0
+        return 2 * recall * precision / (recall + precision)
+
+    def classify(self, text: str) -> Intent | None:
+        """Return the best matching intent for a cleaned transcript, or None."""
+        norm = normalize_question(text)
+        if len(norm.split()) > self.max_tokens:
+            return None
+        words = _content_words(norm)
+        if not words:
+            return None
+        best = None
+        for intent, phrase, tokens, required in self._table:
+            # "no that is all" must not match "is that all"
+            if not tokens or not required.issubset(words):
+                continue
+            score = self._score(words, tokens)
+            if score >= self.threshold and (best is None or score > best.score):
+                best = Intent(intent, score, phrase)
+        return best
@@ -1,27 +1,38 @@
 #!/usr/bin/env python3
 import asyncio
 import json
+import time
 import logging
-from google.oauth2 import service_account
-from googleapiclient.discovery import build
 
 from aiohttp import web
-from slide_detector import slide_queue
-from slides_service import SlidesService
-from slide_mapping import mapping
+from slide_detector import slide_queue, post_command, next_command
+from slides_service import presentation_id_from
+from deck_registry import DeckRegistry
 from tts_service import TTSService
+from tts_cache import TTSAudioCache
+from audio_engine import engine
+from tts_prefetch import NarrationPrefetcher
 from qa_service import QAService
+from stt_service import STTService
+from qa_cache import AnswerCache
+from intent_router import Intent, REPEAT, NEXT, BACK, LOUDER, SLOWER
+from config_loader import load_env, GOOGLE_CREDENTIALS_PATH
 
 # Will hold slide-index → notes text
 notes = {}
 
+# Fixed prompts spoken on every slide; synthesized once and served from cache
+QUESTION_PROMPT = "Any questions about this slide?"
+FOLLOWUP_PROMPT = "Do you have any other questions about this slide?"
+ERROR_PROMPT = "Sorry, I couldn't get an answer right now."
+
 async def slide_change(request):
     """Handle GET /slide-change?hash=#slide=<ID>"""
     raw = request.query.get("hash", "")
     if raw.startswith("#slide="):
         new = raw.split("#slide=", 1)[1]
         print(f"[DETECTOR] {raw!r} → {new!r}")
-        await slide_queue.put(new)
+        await slide_queue.put(new, request.query.get("session", "default"))
     return web.Response(
         text="ok",
         headers={"Access-Control-Allow-Origin": "*"}
@@ -44,84 +55,332 @@ async def healthz(request):
         }
     )
 
-async def main():
-    logging.basicConfig(level=logging.DEBUG, format='[%(levelname)s] %(message)s')
-    logging.info("=== Presentation Assistant: Notes Stage ===")
+async def run_command(intent: Intent, tts, session: str, last_spoken: list[str]) -> bool:
+    """
+    Act on a voice command without calling the LLM.
+    Returns False if the slide's Q&A should stop (e.g. we are changing slide).
+    """
+    if intent.name == REPEAT:
+        await tts.replay(last_spoken)
+    elif intent.name in (NEXT, BACK):
+        # The extension flips the slide; the resulting event preempts this task
+        post_command(intent.name, session)
+        return False
+    elif intent.name == LOUDER:
+        print(f"[QA] Volume gain now {engine.louder():.2f}")
+    elif intent.name == SLOWER:
+        print(f"[QA] Speaking rate now {tts.slow_down():.2f}")
+    return True
 
-    # ——— Load config & Services —————————————————————
-    with open("config.json") as f:
-        cfg = json.load(f)
-    slides_url = cfg.get("slides_url")
-    if not slides_url:
-        raise RuntimeError("Please set slides_url in config.json")
+async def narrate_slide(idx: int, text: str, tts, qa, prefetcher,
+                        stream_answers: bool = True, session: str = "default",
+                        context: str | None = None):
+    """
+    Narrate one slide's notes and run its Q&A.
+    `context` (title, body and notes) grounds the answers; defaults to the notes.
+    Runs as its own task so a newer slide-change event can cancel it mid-clip.
+    """
+    context = context or text
+    # Clips as they were synthesized, so REPEAT replays them from the cache
+    last_spoken = [text]
+    # Narrate the notes: finished prefetched audio plays at once; otherwise
+    # stream (speak() plays cached clips directly and caches streamed ones)
+    audio = prefetcher.ready(idx, text)
+    if audio is not None:
+        await tts.play(audio)
+    else:
+        prefetcher.discard(idx)
+        await tts.speak(text)
 
-    slides = SlidesService("google_credentials.json", slides_url)
-    tts = TTSService()
-    qa = QAService()
-    notes = slides.load_all_notes()
-    logging.info(f"Loaded {len(notes)} slides worth of notes")
+    # Q&A for all slides with limited attempts
+    print("[QA] Ready for questions about this slide...")
+
+    # Initial prompt for questions
+    await tts.speak(QUESTION_PROMPT)
+
+    # Allow up to 2 questions per slide
+    for _ in range(2):
+        try:
+            # Ask for a question (non-blocking)
+            question = await qa.ask_question(timeout=10.0)
+
+            # Handle different response types
+            if question is None:  # Silence or explicit "no"
+                print("[QA] No questions detected")
+                break
+            if isinstance(question, Intent):
+                if not await run_command(question, tts, session, last_spoken):
+                    break
+                continue
+
+            # Get answer with slide context
+            print(f"[QA] Question: {question}")
+            if stream_answers:
+                # Speak each sentence while the rest is still generating
+                asked = time.perf_counter()
+                last_spoken = await tts.speak_stream(qa.answer_stream(question, context),
+                                                     started=asked)
+                print(f"[QA] Answer: {' '.join(last_spoken)}")
+            else:
+                answer = await qa.answer(question, context)
+                print(f"[QA] Answer: {answer}")
+                await tts.speak(answer)
+                last_spoken = [answer]
 
-    # ——— Start HTTP server ───────────────────────────────────
+            # Ask if they have more questions
+            await tts.speak(FOLLOWUP_PROMPT)
+            more_questions = await qa.ask_question(timeout=5.0)
+
+            # Handle follow-up response
+            if more_questions is None:
+                print("[QA] No more questions")
+                break
+            if isinstance(more_questions, Intent):
+                if not await run_command(more_questions, tts, session, last_spoken):
+                    break
+
+        except Exception as e:
+            logging.error(f"QA error: {e}")
+            await tts.speak(ERROR_PROMPT)
+            break
+
+async def start_detector(port: int = 8765) -> web.AppRunner:
+    """Bind the extension's HTTP endpoints; events queue until the consumer runs."""
     app = web.Application()
     app.add_routes([
         web.get   ("/slide-change", slide_change),
         web.options("/slide-change", slide_options),
+        web.get   ("/command",       next_command),
         web.get   ("/healthz",       healthz),
     ])
     runner = web.AppRunner(app)
     await runner.setup()
-    site = web.TCPSite(runner, "0.0.0.0", 8765)
+    site = web.TCPSite(runner, "0.0.0.0", port)
     await site.start()
+    return runner
+
+async def _timed(phases: dict, name: str, awaitable):
+    """Await `awaitable`, recording its wall time in `phases[name]`."""
+    start = time.perf_counter()
+    try:
+        return await awaitable
+    finally:
+        phases[name] = time.perf_counter() - start
+
+def print_startup_report(phases: dict, total: float):
+    """One line per startup phase; concurrent phases overlap, so they sum past the total."""
+    print("[STARTUP] Phase timings:")
+    for name, seconds in phases.items():
+        print(f"[STARTUP]   {name:<12} {seconds * 1000:8.0f} ms")
+    print(f"[STARTUP]   {'total':<12} {total * 1000:8.0f} ms")
+
+def _log_task_error(task: asyncio.Task):
+    """Surface errors from a finished slide task instead of dropping them."""
+    if not task.cancelled() and task.exception() is not None:
+        logging.error(f"Slide task failed: {task.exception()!r}")
+
+async def requeue_when_synced(deck, refetch: asyncio.Task, session: str,
+                              slide_id: str, obj_id: str):
+    """
+    Wait out a deck refetch that outlived slide_resolve_timeout, then hand the
+    event back to the queue if the slide turned up and is still the one on
+    screen. The extension only reports hash changes, so nothing else would.
+    """
+    try:
+        # That refetch itself, not sync(): it may finish before this task runs
+        await asyncio.shield(refetch)
+    except Exception as e:
+        logging.warning(f"[MAIN] Refetch for slide {obj_id!r} failed: {e}")
+        return
+    if deck.mapping.id_to_index.get(obj_id) is None:
+        logging.warning(f"[MAIN] Slide {obj_id!r} not found in deck; not narrating")
+    elif slide_queue.requeue(slide_id, session):
+        logging.info(f"[MAIN] Slide {obj_id!r} found after refetch; narrating")
+
+async def main():
+    logging.basicConfig(level=logging.DEBUG, format='[%(levelname)s] %(message)s')
+    logging.info("=== Presentation Assistant: Notes Stage ===")
+
+    started = time.perf_counter()
+    phases = {}
+
+    # ——— Load config ————————————————————————————————
+    with open("config.json") as f:
+        cfg = json.load(f)
+    slides_url = cfg.get("slides_url")
+    if not slides_url:
+        raise RuntimeError("Please set slides_url in config.json")
+    load_env()
+
+    # ——— Start HTTP server first ─────────────────────────────
+    # Slide events that arrive while services warm up wait in slide_queue
+    slide_queue.debounce = cfg.get("slide_debounce", 0.25)
+    await _timed(phases, "detector", start_detector())
     logging.info("Detector listening on http://127.0.0.1:8765")
 
+    # ——— Initialize services concurrently ────────────────────────
+    # One isolated deck (mapping, notes, sync) per presentation ID; each warm-starts
+    # from its snapshot and checks its revision in the background
+    registry = DeckRegistry(
+        GOOGLE_CREDENTIALS_PATH,
+        snapshot_dir=cfg.get("deck_cache_dir", ".deck_cache"),
+        max_decks=cfg.get("deck_max_loaded", 4),
+        max_bytes=cfg.get("deck_memory_mb", 64) * 1024 * 1024,
+        idle_ttl=cfg.get("deck_idle_ttl", 4 * 3600.0),
+        sync_interval=cfg.get("slides_sync_interval", 15.0),
+        negative_ttl=cfg.get("slide_negative_ttl", 10.0),
+    )
+    default_deck = presentation_id_from(slides_url)
+
+    async def load_deck():
+        # Extra decks for back-to-back talks load alongside the default one
+        decks = await registry.preload([slides_url] + cfg.get("preload_slides_urls", []))
+        for url, deck in zip(cfg.get("preload_slides_urls", []), decks[1:]):
+            if isinstance(deck, BaseException):
+                logging.warning(f"Could not preload {url}: {deck}")
+        if isinstance(decks[0], BaseException):
+            raise decks[0]
+        return decks[0]
+
+    def start_audio():
+        engine.configure(
+            blocksize=cfg.get("audio_blocksize", 512),
+            latency=cfg.get("audio_latency", "low"),
+            device=cfg.get("audio_device"),
+        )
+        engine.start()
+
+    def build_tts():
+        return TTSService(cache=TTSAudioCache(
+            cache_dir=cfg.get("tts_cache_dir", ".tts_cache"),
+            memory_bytes=cfg.get("tts_cache_memory_mb", 32) * 1024 * 1024,
+            disk_bytes=cfg.get("tts_cache_disk_mb", 256) * 1024 * 1024,
+        ), streaming=cfg.get("tts_streaming", True), engine=engine,
+           timeout=cfg.get("tts_timeout", 30.0))
+
+    def build_qa():
+        stt = STTService(
+            timeout=cfg.get("qa_timeout", 20.0),
+            trailing_silence=cfg.get("stt_trailing_silence", 0.8),
+            start_timeout=cfg.get("stt_start_timeout", 4.0),
+            vad_ratio=cfg.get("stt_vad_ratio", 3.0),
+            upload_codec=cfg.get("stt_upload_codec", "flac"),
+            trim_silence=cfg.get("stt_trim_silence", True),
+            preroll=cfg.get("stt_preroll", 0.5),
+            echo_ratio=cfg.get("stt_echo_ratio", 3.0),
+            streaming=cfg.get("stt_streaming", False),
+            partial_hop=cfg.get("stt_partial_hop", 1.5),
+            partial_window=cfg.get("stt_partial_window", 12.0),
+        )
+        return QAService(timeout=cfg.get("qa_timeout", 20.0), cache=AnswerCache(
+            max_entries=cfg.get("qa_cache_size", 256),
+            ttl=cfg.get("qa_cache_ttl", 3600.0),
+            threshold=cfg.get("qa_cache_threshold", 0.75),
+        ), stt=stt)
+
+    slides, _, tts, qa = await asyncio.gather(
+        _timed(phases, "deck", load_deck()),
+        _timed(phases, "audio", asyncio.to_thread(start_audio)),
+        _timed(phases, "tts", asyncio.to_thread(build_tts)),
+        _timed(phases, "stt+qa", asyncio.to_thread(build_qa)),
+    )
+    stt = qa.stt
+    logging.info(f"Audio engine ready: {engine.stats()}")
+    notes = slides.load_all_notes()
+    logging.info(f"Loaded {len(notes)} slides worth of notes")
+
+    # Measure the room's noise floor before anyone is asked a question
+    try:
+        await _timed(phases, "calibration", stt.calibrate(cfg.get("stt_calibration_seconds", 1.0)))
+    except Exception as e:
+        logging.warning(f"Microphone calibration failed: {e}")
+
+    # Render narration for the slides around the current one in the background
+    prefetcher = NarrationPrefetcher(
+        tts, notes,
+        ahead=cfg.get("prefetch_ahead", 2),
+        behind=cfg.get("prefetch_behind", 1),
+        max_concurrency=cfg.get("prefetch_concurrency", 2),
+    )
+    prefetcher.schedule(slides.mapping.current_slide_index)
+
+    # Hot-reload edited notes: forget stale audio/answers for changed slides only
+    def on_deck_change(deck, changes):
+        # A slide that only moved keeps its audio and answers
+        live = deck.index.records
+        live_contexts = {r.context for r in live}
+        live_notes = {r.notes for r in live}
+        for change in changes:
+            if change.old is not None and change.old.context not in live_contexts:
+                qa.cache.invalidate_context(change.old.context)
+            if change.old_notes and change.old_notes not in live_notes:
+                tts.forget(change.old_notes)
+            logging.info(f"[SLIDES] Slide {change.index} changed")
+        if deck is slides:
+            prefetcher.update_notes(deck.load_all_notes(),
+                                    [c.index for c in changes if c.notes_changed])
+            prefetcher.schedule(deck.mapping.current_slide_index)
+    registry.on_change(on_deck_change)
+    asyncio.create_task(registry.keep_token_fresh())
+    asyncio.create_task(tts.warm([QUESTION_PROMPT, FOLLOWUP_PROMPT, ERROR_PROMPT]))
+
+    print_startup_report(phases, time.perf_counter() - started)
+    pending = slide_queue.stats()["pending"]
+    if pending:
+        logging.info(f"Replaying {pending} slide event(s) received during warm-up")
+
     # ——— Consume slide events and handle narration & Q&A ─────────────────
+    current = None
     while True:
-        obj_id = await slide_queue.get()
-        obj_id = obj_id.replace('id.', '')  # Strip the 'id.' prefix
-        idx = mapping.update_current_slide(obj_id)
-        text = notes.get(idx, "<no notes>")
+        session, slide_id = await slide_queue.get_event()
+        obj_id = slide_id.replace('id.', '')  # Strip the 'id.' prefix
+        logging.debug(f"[DETECTOR] Queue stats: {slide_queue.stats()}")
+        # The extension's session is the presentation ID of the deck on screen
+        try:
+            deck = await registry.get(default_deck if session == "default" else session)
+        except Exception as e:
+            logging.error(f"Could not load deck {session!r}: {e}")
+            continue
+        if deck is not slides:
+            logging.info(f"[MAIN] Switching to deck {deck.presentation_id}")
+            slides = deck
+            prefetcher.update_notes(slides.load_all_notes(), [])
+
+        # Preempt whatever the previous slide is still saying or listening for
+        if current is not None and not current.done():
+            print("[MAIN] Slide changed, interrupting previous slide")
+            current.cancel()
+            engine.stop_all()
+
+        # A slide added after the last sync is looked up with a (shared) refetch
+        # instead of falling back to slide 1
+        idx = await slides.resolve(obj_id, timeout=cfg.get("slide_resolve_timeout", 2.0))
+        if idx is None:
+            refetch = slides.pending_sync
+            if refetch is not None:
+                retry = asyncio.create_task(
+                    requeue_when_synced(slides, refetch, session, slide_id, obj_id))
+                retry.add_done_callback(_log_task_error)
+            elif obj_id in slides.mapping.id_to_index:
+                # The refetch landed while resolve() was giving up
+                slide_queue.requeue(slide_id, session)
+            else:
+                logging.warning(f"[MAIN] Slide {obj_id!r} not found in deck; not narrating")
+            continue
+        slides.mapping.update_current_slide(obj_id)
+        prefetcher.schedule(idx)
+
+        record = slides.record(idx)
+        text = record.notes if record is not None and record.notes else "<no notes>"
         print(f"📝 Slide {idx} notes: {text}")
-        
-        # Narrate the notes using TTS
         if text != "<no notes>":
-            await tts.speak(text)
-            
-            # Q&A for all slides with limited attempts
-            print("[QA] Ready for questions about this slide...")
-            
-            # Initial prompt for questions
-            await tts.speak("Any questions about this slide?")
-            
-            # Allow up to 2 questions per slide
-            for _ in range(2):
-                try:
-                    # Ask for a question (non-blocking)
-                    question = await qa.ask_question(timeout=10.0)
-                    
-                    # Handle different response types
-                    if question is None:  # Silence or explicit "no"
-                        print("[QA] No questions detected")
-                        break
-                        
-                    # Get answer with slide context
-                    answer = await qa.answer(question, text)
-                    print(f"[QA] Question: {question}")
-                    print(f"[QA] Answer: {answer}")
-                    await tts.speak(answer)
-                    
-                    # Ask if they have more questions
-                    await tts.speak("Do you have any other questions about this slide?")
-                    more_questions = await qa.ask_question(timeout=5.0)
-                    
-                    # Handle follow-up response
-                    if more_questions is None:
-                        print("[QA] No more questions")
-                        break
-                        
-                except Exception as e:
-                    logging.error(f"QA error: {e}")
-                    await tts.speak("Sorry, I couldn't get an answer right now.")
-                    break
+            current = asyncio.create_task(narrate_slide(
+                idx, text, tts, qa, prefetcher,
+                stream_answers=cfg.get("qa_streaming", True),
+                session=session,
+                context=record.context,
+            ))
+            current.add_done_callback(_log_task_error)
 
 if __name__ == "__main__":
     asyncio.run(main())
\ No newline at end of file
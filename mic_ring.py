@@ -0,0 +1,105 @@
+# mic_ring.py
+"""
+Session-long microphone capture into a fixed-size ring buffer.
+The input stream is opened once; listeners read any recent span of audio by
+absolute sample position, including audio recorded just before they asked
+(pre-roll), without reopening the device.
+"""
+import asyncio
+import logging
+import numpy as np
+
+class MicRingBuffer:
+    def __init__(self, samplerate: int = 16000, seconds: float = 30.0,
+                 blocksize: int = 480, device=None):
+        self.samplerate = samplerate
+        self.blocksize = blocksize
+        self.device = device
+        self._ring = np.zeros(int(seconds * samplerate), dtype=np.int16)
+        self._written = 0  # total samples ever captured; only the audio thread writes it
+        self._stream = None
+        self._loop = None
+        self._ready = None
+
+    @property
+    def position(self) -> int:
+        """Absolute sample index of the next sample to be captured."""
+        return self._written
+
+    @property
+    def oldest(self) -> int:
+        """Oldest absolute sample index still held in the ring."""
+        # Keep a block of slack so the writer never overlaps a read in progress
+        return max(0, self._written - len(self._ring) + self.blocksize)
+
+    def start(self):
+        """Open the input stream once; later calls are no-ops."""
+        if self._stream is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._ready = asyncio.Event()
+        import sounddevice as sd  # loads PortAudio; deferred until a stream opens
+        self._stream = sd.InputStream(
+            samplerate=self.samplerate,
+            channels=1,
+            dtype="int16",
+            blocksize=self.blocksize,
+            device=self.device,
+            callback=self._callback,
+        )
+        self._stream.start()
+        logging.info(f"[MIC] Input open: {self.samplerate} Hz, "
+                     f"ring={len(self._ring) / self.samplerate:.0f}s, "
+                     f"device latency={self._stream.latency * 1000:.1f} ms")
+
+    def _callback(self, indata, frames, time_info, status):
+        size = len(self._ring)
+        data = indata[:, 0]
+        start = self._written % size
+        first = min(frames, size - start)
+        self._ring[start:start + first] = data[:first]
+        if first < frames:
+            self._ring[:frames - first] = data[first:]
+        self._written += frames
+        try:
+            self._loop.call_soon_threadsafe(self._ready.set)
+        except RuntimeError:
+            pass  # loop already closed
+
+    async def wait_for(self, position: int, timeout: float | None = None) -> bool:
+        """Wait until `position` samples have been captured; False on timeout."""
+        deadline = None if timeout is None else self._loop.time() + timeout
+        while self._written < position:
+            self._ready.clear()
+            remaining = None if deadline is None else deadline - self._loop.time()
+            if remaining is not None and remaining <= 0:
+                return False
+            try:
+                await asyncio.wait_for(self._ready.wait(), timeout=remaining)
+            except asyncio.TimeoutError:
+                return self._written >= position
+        return True
+
+    def read_into(self, out: np.ndarray, start: int, end: int) -> int:
+        """
+        Copy samples [start, end) into `out` (starting at out[0]).
+        Returns the number of samples copied; spans older than the ring are clipped.
+        """
+        start = max(start, self.oldest)
+        end = min(end, self._written, start + len(out))
+        n = end - start
+        if n <= 0:
+            return 0
+        size = len(self._ring)
+        offset = start % size
+        first = min(n, size - offset)
+        out[:first] = self._ring[offset:offset + first]
+        if first < n:
+            out[first:n] = self._ring[:n - first]
+        return n
+
+    def close(self):
+        if self._stream is not None:
+            self._stream.stop()
+            self._stream.close()
+            self._stream = None
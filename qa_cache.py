@@ -0,0 +1,130 @@
+# qa_cache.py
+"""
+Answer cache for slide Q&A.
+Entries are keyed by a hash of the slide context plus the normalized question.
+Near-identical questions about the same slide hit the cache through a
+word-level Jaccard match, so "what does this chart mean" and "what does the
+chart mean" share one GPT-4 call. Numbers and negations must match exactly:
+"revenue in 2023" never answers "revenue in 2024", and "who is on the team"
+never answers "who is not on the team".
+"""
+import time
+import hashlib
+from collections import OrderedDict
+
+# Words that change nothing about what is being asked
+_FILLERS = {"um", "uh", "er", "erm", "so", "okay", "ok", "like", "please",
+            "just", "hey", "well", "actually", "basically"}
+
+def normalize_question(text: str) -> str:
+    """Lowercase, strip punctuation and filler words (input is usually already cleaned by STT)."""
+    text = ''.join(c for c in text.lower() if c.isalnum() or c.isspace() or c == "'")
+    return ' '.join(w for w in text.split() if w not in _FILLERS)
+
+# Ignored when comparing questions ("this chart" asks the same as "the chart")
+_DETERMINERS = {"a", "an", "the", "this", "that", "these", "those"}
+
+# Words that flip the meaning of a question
+_NEGATIONS = {"not", "no", "never", "none", "nobody", "nothing", "neither",
+              "nor", "without", "cannot"}
+
+def question_terms(text: str) -> tuple[frozenset[str], frozenset[str]]:
+    """
+    Split a normalized question into (comparable words, must-match words).
+    Must-match words are numbers and negations; a fuzzy hit needs them equal.
+    """
+    words = [w for w in text.split() if w not in _DETERMINERS]
+    exact = frozenset(w for w in words
+                      if any(c.isdigit() for c in w) or w in _NEGATIONS or w.endswith("n't"))
+    return frozenset(words), exact
+
+def jaccard(a: frozenset, b: frozenset) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+def context_key(context: str) -> str:
+    return hashlib.sha256(context.encode("utf-8")).hexdigest()
+
+class AnswerCache:
+    def __init__(self, max_entries: int = 256, ttl: float = 3600.0,
+                 threshold: float = 0.75):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.threshold = threshold
+        # (context hash, normalized question) → (answer, question terms, stored at)
+        self._entries: OrderedDict[tuple[str, str], tuple[str, tuple, float]] = OrderedDict()
+        # context hash → keys of its entries, so fuzzy lookups scan one slide only
+        self._by_context: dict[str, set[tuple[str, str]]] = {}
+        self.hits = 0
+        self.fuzzy_hits = 0
+        self.misses = 0
+
+    def _expired(self, stored_at: float) -> bool:
+        return time.monotonic() - stored_at > self.ttl
+
+    def _remove(self, key: tuple[str, str]):
+        self._entries.pop(key, None)
+        keys = self._by_context.get(key[0])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_context[key[0]]
+
+    def get(self, question: str, context: str) -> str | None:
+        """Return a cached answer for this or a near-identical question on the same slide."""
+        ctx = context_key(context)
+        norm = normalize_question(question)
+        key = (ctx, norm)
+
+        entry = self._entries.get(key)
+        if entry is not None and not self._expired(entry[2]):
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+        words, exact = question_terms(norm)
+        best_key, best_score = None, self.threshold
+        for other in list(self._by_context.get(ctx, ())):
+            answer, (other_words, other_exact), stored_at = self._entries[other]
+            if self._expired(stored_at):
+                self._remove(other)
+                continue
+            if exact != other_exact:
+                continue
+            score = jaccard(words, other_words)
+            if score >= best_score:
+                best_key, best_score = other, score
+        if best_key is not None:
+            self._entries.move_to_end(best_key)
+            self.fuzzy_hits += 1
+            return self._entries[best_key][0]
+
+        self.misses += 1
+        return None
+
+    def put(self, question: str, context: str, answer: str):
+        ctx = context_key(context)
+        norm = normalize_question(question)
+        key = (ctx, norm)
+        self._entries[key] = (answer, question_terms(norm), time.monotonic())
+        self._entries.move_to_end(key)
+        self._by_context.setdefault(ctx, set()).add(key)
+        while len(self._entries) > self.max_entries:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+
+    def invalidate_context(self, context: str) -> int:
+        """Drop every answer for a slide context, e.g. after its notes change."""
+        keys = self._by_context.pop(context_key(context), set())
+        for key in keys:
+            self._entries.pop(key, None)
+        return len(keys)
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "fuzzy_hits": self.fuzzy_hits,
+            "misses": self.misses,
+        }
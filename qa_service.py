@@ -1,38 +1,84 @@
 # qa_service.py
 import os
-from dotenv import load_dotenv
-from openai import OpenAI
+import re
+from http_pool import get_async_client
+from config_loader import load_env
 from stt_service import STTService
+from qa_cache import AnswerCache
+from intent_router import IntentRouter, Intent, DECLINE
+from stream_transcript import TranscriptEvent, PARTIAL
 
-load_dotenv()
+# End of a sentence: terminal punctuation, optional closing quote/bracket, then space
+_SENTENCE_END = re.compile(r'[.!?]["\')\]]*\s+')
+
+def split_sentences(buffer: str, min_chars: int = 20) -> tuple[list[str], str]:
+    """
+    Cut complete sentences off the front of a growing token buffer.
+    Fragments shorter than `min_chars` are held back and merged with the next
+    sentence so TTS is not called for "Yes." on its own.
+
+    Returns:
+        (complete sentences, remaining partial text)
+    """
+    sentences = []
+    start = 0
+    for m in _SENTENCE_END.finditer(buffer):
+        candidate = buffer[start:m.end()].strip()
+        if len(candidate) < min_chars:
+            continue
+        sentences.append(candidate)
+        start = m.end()
+    return sentences, buffer[start:]
 
 class QAService:
-    def __init__(self):
+    def __init__(self, timeout: float = 20.0, cache: AnswerCache | None = None,
+                 stt: STTService | None = None, router: IntentRouter | None = None):
+        load_env()
         api_key = os.getenv("OPENAI_API_KEY")
         if not api_key:
             raise RuntimeError("OPENAI_API_KEY not set in .env")
-        # Instantiate the new OpenAI client
-        self.client = OpenAI(api_key=api_key)
+        # Async client on the shared connection pool so answers never block the loop
+        from openai import AsyncOpenAI
+        self.client = AsyncOpenAI(api_key=api_key, http_client=get_async_client())
         self.model = "gpt-4"
-        self.stt = STTService()
-        
-        # Common variations of "no" responses
-        self.no_responses = {
-            "no", "nope", "none", "nothing", "skip",
-            "no questions", "no thank you", "no thanks", "not now"
-        }
+        self.timeout = timeout
+        self.stt = stt if stt is not None else STTService(timeout=timeout)
+        self.cache = cache if cache is not None else AnswerCache()
+
+        # Declines ("no", "nah I'm good") and voice commands, matched locally
+        self.router = router if router is not None else IntentRouter()
+
+        # Partial transcripts (streaming STT) let intent detection start early
+        self.partial_question = ""
+        self.early_intent: Intent | None = None
+        self.stt.subscribe(self._on_transcript)
+
+    def _on_transcript(self, event: TranscriptEvent):
+        """Watch partial transcripts for commands so capture can stop sooner."""
+        if event.kind != PARTIAL:
+            self.partial_question = ""
+            return
+        self.partial_question = event.text
+        intent = self.router.classify(event.text)
+        if intent is not None and intent != self.early_intent:
+            print(f"[QA] Early intent {intent.name} from partial {event.text!r}")
+            # Short replies like "no thanks" need no long trailing pause
+            self.stt.request_early_endpoint()
+        self.early_intent = intent
 
-    async def ask_question(self, timeout: float = 5.0) -> str | None:
+    async def ask_question(self, timeout: float = 5.0) -> str | Intent | None:
         """
         Use speech-to-text to get a question from the user.
         
         Returns:
             str: The transcribed question if one was detected
-            None: If no audio was detected or on timeout
+            Intent: If the reply was a voice command ("repeat that", "next slide")
+            None: If no audio was detected, on timeout, or on a decline
         Raises:
             Exception: If there was an error with the STT service
         """
         try:
+            self.early_intent = None
             response = await self.stt.listen(timeout)
             
             # Handle silence/timeout
@@ -41,10 +87,12 @@ class QAService:
                 
             # Convert to lowercase for comparison
             response = response.lower()
-            
-            # Check for "no" responses
-            if response in self.no_responses:
-                return None
+
+            # Declines and commands never reach the LLM
+            intent = self.router.classify(response)
+            if intent is not None:
+                print(f"[QA] Intent {intent.name} ({intent.score:.2f}) for {response!r}")
+                return None if intent.name == DECLINE else intent
                 
             # Return the original response (not lowercase)
             return response
@@ -53,12 +101,11 @@ class QAService:
             # Log the error but let the caller handle it
             raise Exception(f"STT error: {str(e)}")
 
-    def get_answer(self, question: str) -> str:
+    async def get_answer(self, question: str) -> str:
         """
         Get an answer to a question using GPT-4.
         """
-        # Synchronous call—no await
-        resp = self.client.chat.completions.create(
+        resp = await self.client.chat.completions.create(
             model=self.model,
             messages=[
                 {"role": "system", "content": "You are a concise assistant answering slide-related questions."},
@@ -66,23 +113,78 @@ class QAService:
             ],
             temperature=0.5,
             max_tokens=150,  # Reduced from 200 to 150 for faster responses
+            timeout=self.timeout,
         )
         return resp.choices[0].message.content.strip()
 
     async def answer(self, question: str, context: str) -> str:
         """
         Query GPT-4 with the user question and full slide-context using the
-        new synchronous chat API.
+        async chat API. Repeated (or near-identical) questions about the same
+        slide are served from the answer cache.
         """
+        cached = self.cache.get(question, context)
+        if cached is not None:
+            print(f"[QA] Answer cache hit for: {question!r}")
+            return cached
+
         messages = [
             {"role": "system", "content": "You are a concise assistant answering slide-related questions."},
             {"role": "user", "content": f"Context:\n{context}\n\nQuestion: {question}"}
         ]
-        # Synchronous call—no await
-        resp = self.client.chat.completions.create(
+        resp = await self.client.chat.completions.create(
             model=self.model,
             messages=messages,
             temperature=0.5,
             max_tokens=150,  # Reduced from 200 to 150 for faster responses
+            timeout=self.timeout,
         )
-        return resp.choices[0].message.content.strip()
\ No newline at end of file
+        answer = resp.choices[0].message.content.strip()
+        self.cache.put(question, context, answer)
+        return answer
+
+    async def answer_stream(self, question: str, context: str):
+        """
+        Like answer(), but yields the reply sentence by sentence while GPT-4
+        is still generating, so TTS can start on the first sentence.
+        Only a fully received answer is stored in the answer cache.
+        """
+        cached = self.cache.get(question, context)
+        if cached is not None:
+            print(f"[QA] Answer cache hit for: {question!r}")
+            sentences, rest = split_sentences(cached + " ")
+            for sentence in sentences:
+                yield sentence
+            if rest.strip():
+                yield rest.strip()
+            return
+
+        messages = [
+            {"role": "system", "content": "You are a concise assistant answering slide-related questions."},
+            {"role": "user", "content": f"Context:\n{context}\n\nQuestion: {question}"}
+        ]
+        stream = await self.client.chat.completions.create(
+            model=self.model,
+            messages=messages,
+            temperature=0.5,
+            max_tokens=150,
+            timeout=self.timeout,
+            stream=True,
+        )
+        buffer = ""
+        full = []
+        try:
+            async for chunk in stream:
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content or ""
+                full.append(delta)
+                buffer += delta
+                sentences, buffer = split_sentences(buffer)
+                for sentence in sentences:
+                    yield sentence
+        finally:
+            await stream.close()
+        if buffer.strip():
+            yield buffer.strip()
+        self.cache.put(question, context, "".join(full).strip())
@@ -1,8 +1,110 @@
 import asyncio
+import time
 from aiohttp import web
 
+class CoalescingSlideQueue:
+    """
+    Slide-change queue that keeps only the newest slide ID per session.
+
+    An event is released once no newer event for the same session has
+    arrived within the debounce window, so clicking quickly through ten
+    slides narrates only the one the presenter stops on.
+
+    Counters:
+        coalesced: events superseded by a newer one before delivery
+        dropped:   settled events for the slide that session already got
+        requeued:  delivered events handed out again via requeue()
+    """
+    def __init__(self, debounce: float = 0.25):
+        self.debounce = debounce
+        self._pending: dict[str, tuple[str, float]] = {}  # session → (slide ID, last update)
+        self._delivered: dict[str, str] = {}              # session → last slide ID handed out
+        self._changed = asyncio.Event()
+        self.received = 0
+        self.coalesced = 0
+        self.dropped = 0
+        self.delivered = 0
+        self.requeued = 0
+
+    def put_nowait(self, slide_id: str, session: str = "default"):
+        self.received += 1
+        if session in self._pending:
+            self.coalesced += 1
+        self._pending[session] = (slide_id, time.monotonic())
+        self._changed.set()
+
+    async def put(self, slide_id: str, session: str = "default"):
+        self.put_nowait(slide_id, session)
+
+    def requeue(self, slide_id: str, session: str = "default") -> bool:
+        """
+        Deliver an already-delivered event again, right away, e.g. when the
+        consumer could not act on it yet. Skipped if the session has moved on.
+
+        Returns:
+            bool: True if the event was queued again
+        """
+        if self._delivered.get(session) != slide_id or session in self._pending:
+            return False
+        del self._delivered[session]
+        self._pending[session] = (slide_id, time.monotonic() - self.debounce)
+        self.requeued += 1
+        self._changed.set()
+        return True
+
+    def qsize(self) -> int:
+        return len(self._pending)
+
+    def empty(self) -> bool:
+        return not self._pending
+
+    async def get_event(self) -> tuple[str, str]:
+        """Wait for the next settled event and return (session, slide ID)."""
+        while True:
+            self._changed.clear()
+            now = time.monotonic()
+            wait = None
+            for session, (slide_id, stamp) in list(self._pending.items()):
+                remaining = stamp + self.debounce - now
+                if remaining > 0:
+                    wait = remaining if wait is None else min(wait, remaining)
+                    continue
+                del self._pending[session]
+                if self._delivered.get(session) == slide_id:
+                    self.dropped += 1
+                    continue
+                self._delivered[session] = slide_id
+                self.delivered += 1
+                return session, slide_id
+            try:
+                await asyncio.wait_for(self._changed.wait(), timeout=wait)
+            except asyncio.TimeoutError:
+                pass
+
+    async def get(self) -> str:
+        """Wait for the next settled slide ID (asyncio.Queue-compatible)."""
+        _, slide_id = await self.get_event()
+        return slide_id
+
+    def stats(self) -> dict:
+        return {
+            "received": self.received,
+            "delivered": self.delivered,
+            "coalesced": self.coalesced,
+            "dropped": self.dropped,
+            "requeued": self.requeued,
+            "pending": len(self._pending),
+        }
+
 current_slide_id = None
-slide_queue      = asyncio.Queue()
+slide_queue      = CoalescingSlideQueue()
+
+# Navigation commands waiting for the extension to pick up, per session
+pending_commands: dict[str, list[str]] = {}
+
+def post_command(command: str, session: str = "default"):
+    """Queue a navigation command ("next"/"back") for the extension."""
+    pending_commands.setdefault(session, []).append(command)
 
 async def slide_change(request):
     global current_slide_id
@@ -11,7 +113,7 @@ async def slide_change(request):
         new = raw.split("#slide=", 1)[1]
         print(f"[DETECTOR] {raw!r} → {new!r}")
         current_slide_id = new
-        await slide_queue.put(new)
+        await slide_queue.put(new, request.query.get("session", "default"))
     return web.Response(
         text="ok",
         headers={
@@ -19,6 +121,16 @@ async def slide_change(request):
         }
     )
 
+async def next_command(request):
+    """Polled by the extension: return (and clear) the oldest pending command."""
+    session = request.query.get("session", "default")
+    queued = pending_commands.get(session) or pending_commands.get("default") or []
+    command = queued.pop(0) if queued else None
+    return web.json_response(
+        {"command": command},
+        headers={"Access-Control-Allow-Origin": "*"}
+    )
+
 async def slide_options(request):
     return web.Response(
         status=200,
@@ -39,7 +151,7 @@ async def healthz(request):
 async def run_detector():
     """
     Coroutine to start the aiohttp server under the current asyncio loop,
-    then return the asyncio.Queue of slide IDs.
+    then return the queue of slide IDs.
     """
     app = create_app()
     runner = web.AppRunner(app)
@@ -53,6 +165,7 @@ def create_app():
     app.add_routes([
         web.get   ("/slide-change", slide_change),
         web.options("/slide-change", slide_options),
+        web.get   ("/command",       next_command),
         web.get   ("/healthz",       healthz),
     ])
     return app
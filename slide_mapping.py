@@ -10,11 +10,20 @@ class SlideMapping:
         """Add a mapping from slide ID to index."""
         self.id_to_index[slide_id] = index
 
-    def update_current_slide(self, slide_id: str) -> int:
-        """Update the current slide ID and return its index."""
-        self.current_slide_id = slide_id
-        self.current_slide_index = self.id_to_index.get(slide_id, 1)
-        return self.current_slide_index
+    def replace_mappings(self, id_to_index: dict[str, int]):
+        """Swap in a complete objectId→index map (e.g. after a deck sync)."""
+        self.id_to_index = dict(id_to_index)
+        if self.current_slide_id in self.id_to_index:
+            self.current_slide_index = self.id_to_index[self.current_slide_id]
 
-# Global instance
-mapping = SlideMapping() 
\ No newline at end of file
+    def update_current_slide(self, slide_id: str) -> int | None:
+        """
+        Update the current slide ID and return its index.
+        Returns None (and keeps the current index) if the ID is unknown.
+        """
+        index = self.id_to_index.get(slide_id)
+        if index is None:
+            return None
+        self.current_slide_id = slide_id
+        self.current_slide_index = index
+        return index
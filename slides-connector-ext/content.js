@@ -3,8 +3,15 @@
 let lastHash = '';
 const baseUrl = 'http://127.0.0.1:8765';
 
+// Presentation ID from /presentation/d/<id>/..., used as the event session
+function currentSession() {
+    const m = window.location.pathname.match(/\/d\/([A-Za-z0-9_-]+)/);
+    return m ? m[1] : 'default';
+}
+
 function sendSlideChange(hash) {
-    fetch(`${baseUrl}/slide-change?hash=${encodeURIComponent(hash)}`)
+    const session = encodeURIComponent(currentSession());
+    fetch(`${baseUrl}/slide-change?hash=${encodeURIComponent(hash)}&session=${session}`)
         .then(() => console.log('[Connector] sent', hash))
         .catch(err => console.error('[Connector] error', err));
 }
@@ -17,8 +24,31 @@ function processHashChange() {
     }
 }
 
-// Process slide changes every 500ms
-setInterval(processHashChange, 500);
+// Voice commands from the assistant ("next slide", "go back")
+const commandKeys = {
+    next: { key: 'ArrowRight', keyCode: 39 },
+    back: { key: 'ArrowLeft', keyCode: 37 },
+};
+
+function pollCommand() {
+    const session = encodeURIComponent(currentSession());
+    fetch(`${baseUrl}/command?session=${session}`)
+        .then(resp => resp.json())
+        .then(({ command }) => {
+            const key = commandKeys[command];
+            if (!key) return;
+            console.log('[Connector] command', command);
+            const target = document.activeElement || document.body;
+            target.dispatchEvent(new KeyboardEvent('keydown', { ...key, bubbles: true }));
+        })
+        .catch(() => {});
+}
+
+// Process slide changes (and pick up commands) every 500ms
+setInterval(() => {
+    processHashChange();
+    pollCommand();
+}, 500);
 
 // Also listen for hashchange events
 window.addEventListener('hashchange', processHashChange, false);
\ No newline at end of file
@@ -1,68 +1,334 @@
 # slides_service.py
 
+import os
 import re
-from google.oauth2 import service_account
-from googleapiclient.discovery import build
-from slide_mapping import mapping
+import json
+import time
+import asyncio
+import hashlib
+import functools
+import logging
+import threading
+from typing import NamedTuple
+from deck_index import DeckIndex, SlideRecord, ELEMENT_FIELDS, build_record
+from slide_mapping import SlideMapping
+from deck_snapshot import save_snapshot, load_snapshot
+from google_token import ServiceAccountToken
 
 SCOPES = ["https://www.googleapis.com/auth/presentations.readonly"]
 
-def extract_text_from_element(element):
-    """Extracts text from a page element."""
-    text = ""
-    if 'shape' in element:
-        shape = element['shape']
-        if 'text' in shape:
-            for text_element in shape['text'].get('textElements', []):
-                if 'textRun' in text_element:
-                    text += text_element['textRun'].get('content', '')
-    return text
+# Partial response: only the fields the parser reads (text, placeholder types,
+# object IDs), instead of every transform, style and image in the deck
+DECK_FIELDS = (
+    "revisionId,"
+    f"slides(objectId,pageElements({ELEMENT_FIELDS}),"
+    "slideProperties/notesPage(notesProperties/speakerNotesObjectId,"
+    f"pageElements({ELEMENT_FIELDS})))"
+)
+
+@functools.cache
+def discovery_document() -> str:
+    """Slides v1 discovery document bundled with googleapiclient (read once)."""
+    from googleapiclient.discovery_cache import get_static_doc
+    return get_static_doc("slides", "v1")
+
+def presentation_id_from(slides_url: str) -> str:
+    """Presentation ID from a Slides URL; a bare ID is returned unchanged."""
+    m = re.search(r"/d/([A-Za-z0-9_-]+)", slides_url)
+    if m:
+        return m.group(1)
+    if re.fullmatch(r"[A-Za-z0-9_-]{20,}", slides_url):
+        return slides_url
+    raise ValueError(f"Invalid Google Slides URL: {slides_url}")
+
+def slide_fingerprint(slide) -> str:
+    """Content hash of a slide, used to skip re-parsing unchanged slides."""
+    return hashlib.sha1(json.dumps(slide, sort_keys=True).encode("utf-8")).hexdigest()
+
+def _content(record: SlideRecord | None):
+    return None if record is None else (record.title, record.paragraphs, record.notes)
+
+class SlideChange(NamedTuple):
+    index: int
+    object_id: str | None
+    old: SlideRecord | None   # None if the slide index is new
+    new: SlideRecord | None   # None if the deck got shorter
+
+    @property
+    def old_notes(self) -> str | None:
+        return self.old.notes if self.old else None
+
+    @property
+    def new_notes(self) -> str | None:
+        return self.new.notes if self.new else None
+
+    @property
+    def notes_changed(self) -> bool:
+        return self.old_notes != self.new_notes
 
 class SlidesService:
-    def __init__(self, creds_path: str, slides_url: str):
-        # 1) Extract presentation ID from the URL
-        m = re.search(r"/d/([A-Za-z0-9_-]+)", slides_url)
-        if not m:
-            raise ValueError(f"Invalid Google Slides URL: {slides_url}")
-        presentation_id = m.group(1)
-
-        # 2) Authenticate using service account JSON
-        creds = service_account.Credentials.from_service_account_file(
-            creds_path, scopes=SCOPES
-        )
-        service = build("slides", "v1", credentials=creds)
-
-        # 3) Fetch the presentation
-        presentation = (
-            service.presentations()
-                   .get(presentationId=presentation_id)
-                   .execute()
-        )
-        slides = presentation.get("slides", [])
-
-        # 4) Build objectId→index map and index→notes map
-        self.notes_by_slide = {}
-
-        for idx, slide in enumerate(slides, start=1):
-            object_id = slide.get("objectId")
-            if object_id:
-                mapping.add_mapping(object_id, idx)
-
-            # Get notes from slideProperties.notesPage
-            notes_text = ""
-            if 'slideProperties' in slide and 'notesPage' in slide['slideProperties']:
-                notes_page = slide['slideProperties']['notesPage']
-                if 'pageElements' in notes_page:
-                    for element in notes_page['pageElements']:
-                        notes_text += extract_text_from_element(element)
-
-            # Clean up the text and store if not empty
-            notes_text = ' '.join(notes_text.split())
-            if notes_text:
-                self.notes_by_slide[idx] = notes_text
+    def __init__(self, creds_path: str, slides_url: str, snapshot_dir: str | None = ".deck_cache",
+                 auth: ServiceAccountToken | None = None, negative_ttl: float = 10.0):
+        # 1) Presentation ID from the URL (or a bare ID)
+        self.presentation_id = presentation_id_from(slides_url)
+
+        # 2) API client is built on first use, so a snapshot start never waits on it;
+        #    decks in a DeckRegistry share one `auth` token
+        self.creds_path = creds_path
+        self._auth = auth
+        self._service = None
+
+        # 3) Slide records (title, body, notes), filled by load() or load_snapshot()
+        self.index = DeckIndex()
+        self.mapping = SlideMapping()   # this deck's objectId→index and current slide
+        self.revision_id = None
+        self._parsed = {}   # objectId → (fingerprint, SlideRecord)
+        self._order = []    # (fingerprint, SlideRecord) in deck order
+        self.snapshot_dir = snapshot_dir
+        self._listeners = []
+        # httplib2 connections are not thread-safe; one request at a time
+        self._http_lock = threading.Lock()
+        self.last_fetch = {}
+        # One sync at a time; background polls and lookup misses share it
+        self._sync_task: asyncio.Task | None = None
+        # Slide IDs still unknown after a refetch → when to try again
+        self._unknown: dict[str, float] = {}
+        self.negative_ttl = negative_ttl
+        self.lookups = {"hits": 0, "misses": 0, "negative_hits": 0}
+
+    @property
+    def notes_by_slide(self) -> dict[int, str]:
+        return self.index.notes_by_slide
+
+    @property
+    def auth(self) -> ServiceAccountToken:
+        """Service-account token, cached next to the deck snapshots."""
+        if self._auth is None:
+            cache_path = os.path.join(self.snapshot_dir, "token.json") if self.snapshot_dir else None
+            self._auth = ServiceAccountToken(self.creds_path, SCOPES, cache_path=cache_path)
+        return self._auth
+
+    @property
+    def service(self):
+        """Slides API client, built from the bundled discovery document (no network)."""
+        if self._service is None:
+            from googleapiclient.discovery import build, build_from_document
+            doc = discovery_document()
+            if doc is not None:
+                self._service = build_from_document(doc, credentials=self.auth.credentials)
+            else:
+                self._service = build("slides", "v1", credentials=self.auth.credentials)
+        return self._service
+
+    def _execute(self, request, label: str) -> dict:
+        """Run a Slides API request (blocking), logging payload size and time."""
+        sizes = {}
+        postproc = request.postproc
+
+        def measure(resp, content):
+            sizes["bytes"] = len(content)
+            sizes["gzip"] = resp.get("-content-encoding") == "gzip"
+            return postproc(resp, content)
+
+        request.postproc = measure
+        start = time.perf_counter()
+        with self._http_lock:
+            # Normally a no-op: DeckRegistry.keep_token_fresh() refreshes ahead of expiry
+            self.auth.ensure_fresh()
+            result = request.execute(num_retries=2)
+        self.last_fetch = {
+            "request": label,
+            "bytes": sizes.get("bytes", 0),
+            "gzip": sizes.get("gzip", False),
+            "seconds": round(time.perf_counter() - start, 3),
+        }
+        logging.info(f"[SLIDES] Fetched {label}: {self.last_fetch}")
+        return result
+
+    def _fetch(self) -> dict:
+        # The JSON model already asks for gzip ("accept-encoding" and a
+        # "(gzip)" user agent); the field mask keeps the payload to slide text
+        request = self.service.presentations().get(
+            presentationId=self.presentation_id, fields=DECK_FIELDS)
+        return self._execute(request, "deck")
+
+    def _fetch_revision(self) -> str | None:
+        request = self.service.presentations().get(
+            presentationId=self.presentation_id, fields="revisionId")
+        return self._execute(request, "revision").get("revisionId")
+
+    async def load(self) -> dict[int, str]:
+        """Fetch and parse the deck off the event loop; returns the notes map."""
+        self._apply(await asyncio.to_thread(self._fetch))
+        await asyncio.to_thread(self._save_snapshot)
+        return self.notes_by_slide
+
+    def load_snapshot(self) -> bool:
+        """
+        Restore the last parsed deck from disk (no network).
+        Returns False if there is no snapshot for this presentation.
+        """
+        if not self.snapshot_dir:
+            return False
+        data = load_snapshot(self.snapshot_dir, self.presentation_id)
+        if data is None:
+            return False
+        entries = [
+            (fingerprint, SlideRecord(idx, object_id, title, tuple(paragraphs), notes))
+            for idx, (object_id, fingerprint, title, paragraphs, notes)
+            in enumerate(data["slides"], start=1)
+        ]
+        self._install(data["revision_id"], entries)
+        age = time.time() - data.get("saved_at", time.time())
+        logging.info(f"[SLIDES] Loaded snapshot at revision {self.revision_id} "
+                     f"({len(self._order)} slides, {age / 60:.0f} min old)")
+        return True
+
+    def _save_snapshot(self):
+        if self.snapshot_dir:
+            save_snapshot(self.snapshot_dir, self.presentation_id, self.revision_id, [
+                (r.object_id, fingerprint, r.title, r.paragraphs, r.notes)
+                for fingerprint, r in self._order
+            ])
+
+    def _apply(self, presentation: dict) -> list[SlideChange]:
+        """
+        Rebuild the index from a fetched presentation, re-parsing only slides
+        whose content changed, and swap it in atomically.
+        Returns one SlideChange per slide index whose title, body or notes changed.
+        """
+        entries = []
+        for idx, slide in enumerate(presentation.get("slides", []), start=1):
+            fingerprint = slide_fingerprint(slide)
+            cached = self._parsed.get(slide.get("objectId"))
+            if cached is not None and cached[0] == fingerprint:
+                record = cached[1] if cached[1].index == idx else cached[1]._replace(index=idx)
+            else:
+                record = build_record(idx, slide)
+            entries.append((fingerprint, record))
+        return self._install(presentation.get("revisionId"), entries)
+
+    def _install(self, revision_id: str | None,
+                 entries: list[tuple[str, SlideRecord]]) -> list[SlideChange]:
+        index = DeckIndex([record for _, record in entries])
+        old = self.index
+        changes = []
+        for idx in range(1, max(len(old), len(index)) + 1):
+            before, after = old.get(idx), index.get(idx)
+            if _content(before) != _content(after):
+                object_id = (after or before).object_id
+                changes.append(SlideChange(idx, object_id, before, after))
+
+        # Swap everything in at once so readers never see a half-updated deck
+        self.index = index
+        self._parsed = {r.object_id: (fp, r) for fp, r in entries if r.object_id}
+        self._order = entries
+        self.revision_id = revision_id
+        self._unknown.clear()   # a new revision may contain them
+        self.mapping.replace_mappings({r.object_id: r.index for r in index.records if r.object_id})
+        return changes
+
+    def on_change(self, callback):
+        """Call `callback(list[SlideChange])` whenever a sync changes any slide."""
+        self._listeners.append(callback)
+
+    @property
+    def pending_sync(self) -> asyncio.Task | None:
+        """
+        The refetch in flight, if any. Await it through asyncio.shield():
+        calling sync() again once it is done would fetch the revision again.
+        """
+        if self._sync_task is None or self._sync_task.done():
+            return None
+        return self._sync_task
+
+    async def sync(self) -> list[SlideChange]:
+        """
+        Pick up deck edits if the presentation's revision moved.
+        Concurrent callers share the sync already in flight.
+        """
+        if self._sync_task is None or self._sync_task.done():
+            self._sync_task = asyncio.create_task(self._sync())
+        # Shield so a caller that gives up does not cancel it for the others
+        return await asyncio.shield(self._sync_task)
+
+    async def _sync(self) -> list[SlideChange]:
+        revision = await asyncio.to_thread(self._fetch_revision)
+        if revision is not None and revision == self.revision_id:
+            return []
+        presentation = await asyncio.to_thread(self._fetch)
+        changes = self._apply(presentation)
+        await asyncio.to_thread(self._save_snapshot)
+        logging.info(f"[SLIDES] Revision {revision}: {len(changes)} slide(s) changed")
+        for callback in self._listeners:
+            try:
+                callback(changes)
+            except Exception as e:
+                logging.error(f"[SLIDES] Change listener failed: {e}")
+        return changes
+
+    async def resolve(self, object_id: str, timeout: float = 2.0) -> int | None:
+        """
+        Slide index for `object_id`. An unknown ID (e.g. a slide added since
+        the last sync) triggers a refetch, waited on for up to `timeout`
+        seconds; an ID still unknown afterwards is remembered for
+        `negative_ttl` seconds so repeated events for it make no API calls.
+
+        Returns:
+            int: The slide's index
+            None: If the ID is not in this deck (or the refetch is still running)
+        """
+        index = self.mapping.id_to_index.get(object_id)
+        if index is not None:
+            self.lookups["hits"] += 1
+            return index
+        retry_at = self._unknown.get(object_id)
+        if retry_at is not None and time.monotonic() < retry_at:
+            self.lookups["negative_hits"] += 1
+            return None
+
+        self.lookups["misses"] += 1
+        logging.info(f"[SLIDES] Unknown slide {object_id!r}; refetching deck")
+        try:
+            await asyncio.wait_for(self.sync(), timeout)
+        except asyncio.TimeoutError:
+            # The refetch keeps going (see `pending_sync`); callers may wait it out
+            logging.warning(f"[SLIDES] Refetch for {object_id!r} still running after {timeout}s")
+            return None
+        except Exception as e:
+            logging.warning(f"[SLIDES] Refetch for {object_id!r} failed: {e}")
+        index = self.mapping.id_to_index.get(object_id)
+        if index is None:
+            self._unknown[object_id] = time.monotonic() + self.negative_ttl
+        return index
+
+    async def sync_forever(self, interval: float | None = 15.0, immediate: bool = False):
+        """
+        Background task: poll the revision every `interval` seconds
+        (starting right away if `immediate`, e.g. after a snapshot start).
+        With no interval, only the immediate check runs.
+        """
+        while True:
+            if not immediate:
+                if not interval:
+                    return
+                await asyncio.sleep(interval)
+            immediate = False
+            try:
+                await self.sync()
+            except Exception as e:
+                logging.warning(f"[SLIDES] Sync failed: {e}")
+
+    def memory_bytes(self) -> int:
+        """Rough in-memory size of this deck's parsed content."""
+        return self.index.text_bytes
+
+    def record(self, index: int) -> SlideRecord | None:
+        """Structured content of slide `index` (title, body, notes)."""
+        return self.index.get(index)
 
     def load_all_notes(self) -> dict[int, str]:
         """
         Return a mapping of slide index → full speaker-notes text.
         """
-        return self.notes_by_slide
\ No newline at end of file
+        return self.notes_by_slide
@@ -0,0 +1,69 @@
+# stream_transcript.py
+"""
+Helpers for streaming transcription over overlapping audio windows.
+Each window is transcribed on its own; TranscriptMerger folds the successive
+hypotheses into a stable prefix (words two consecutive hypotheses agree on)
+plus an unstable tail that may still change.
+"""
+from typing import NamedTuple
+
+PARTIAL = "partial"
+FINAL = "final"
+
+class TranscriptEvent(NamedTuple):
+    kind: str     # PARTIAL or FINAL
+    text: str     # best full hypothesis so far (stable + unstable)
+    stable: str   # prefix that will not change any more
+
+def _overlap(stable: list[str], words: list[str]) -> int:
+    """Length of the longest suffix of `stable` that is a prefix of `words`."""
+    for k in range(min(len(stable), len(words)), 0, -1):
+        if stable[-k:] == words[:k]:
+            return k
+    return 0
+
+class TranscriptMerger:
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.stable: list[str] = []
+        self.tail: list[str] = []   # unstable words after the stable prefix
+
+    def update(self, hypothesis: str) -> TranscriptEvent:
+        """
+        Merge the transcript of the newest window.
+        A window may start after the utterance did (sliding windows), so the
+        part already committed is located by suffix/prefix overlap first.
+        Hypotheses that cannot be aligned with the stable prefix are ignored
+        rather than appended.
+        """
+        words = hypothesis.split()
+        n = len(self.stable)
+        common = 0
+        for a, b in zip(words, self.stable):
+            if a != b:
+                break
+            common += 1
+        if common >= n - 1 and len(words) >= n:
+            # Same anchor as before (tolerating one re-spelled word)
+            new = words[n:]
+        else:
+            k = _overlap(self.stable, words)
+            if not k:
+                return self.event(PARTIAL)
+            new = words[k:]
+
+        # Local agreement: commit what this and the previous hypothesis share
+        agreed = 0
+        for a, b in zip(new, self.tail):
+            if a != b:
+                break
+            agreed += 1
+        self.stable += new[:agreed]
+        self.tail = new[agreed:]
+        return self.event(PARTIAL)
+
+    def event(self, kind: str) -> TranscriptEvent:
+        stable = " ".join(self.stable)
+        return TranscriptEvent(kind, " ".join(self.stable + self.tail), stable)
@@ -1,21 +1,93 @@
 # stt_service.py
+import io
 import os
-import tempfile
-import openai
-import sounddevice as sd
-import soundfile as sf
-from dotenv import load_dotenv
+import time
+import asyncio
+import numpy as np
+from http_pool import get_async_client
+from config_loader import load_env
+from vad import VoiceActivityDetector, warm_kernel
+from mic_ring import MicRingBuffer
+from audio_engine import AudioEngine, engine as default_engine
+from stream_transcript import TranscriptEvent, TranscriptMerger, FINAL
 
-load_dotenv()
+# Upload codec → (soundfile format, subtype, file name sent to the API)
+UPLOAD_CODECS = {
+    "wav":  ("WAV", "PCM_16", "speech.wav"),
+    "flac": ("FLAC", "PCM_16", "speech.flac"),
+    "opus": ("OGG", "OPUS", "speech.ogg"),
+}
 
 class STTService:
-    def __init__(self):
+    def __init__(self, timeout: float = 20.0, trailing_silence: float = 0.8,
+                 start_timeout: float | None = 4.0, vad_ratio: float = 3.0,
+                 upload_codec: str = "flac", trim_silence: bool = True,
+                 preroll: float = 0.5, mic: MicRingBuffer | None = None,
+                 streaming: bool = False, partial_hop: float = 1.5,
+                 partial_window: float = 12.0, engine: AudioEngine | None = None,
+                 echo_guard: float = 0.15, echo_ratio: float = 3.0):
+        load_env()
         api_key = os.getenv("OPENAI_API_KEY")
         if not api_key:
             raise RuntimeError("OPENAI_API_KEY not set in .env")
-        openai.api_key = api_key
+        from openai import AsyncOpenAI
+        self.client = AsyncOpenAI(api_key=api_key, http_client=get_async_client())
+        self.timeout = timeout
+        if upload_codec not in UPLOAD_CODECS:
+            raise ValueError(f"Unknown upload codec {upload_codec!r}; use one of {sorted(UPLOAD_CODECS)}")
+        self.upload_codec = upload_codec
+        self.trim_silence = trim_silence
         self.samplerate = 16000
         self.channels = 1
+        # Stop listening if nobody has started talking after this many seconds
+        self.start_timeout = start_timeout
+        self.vad = VoiceActivityDetector(
+            samplerate=self.samplerate,
+            threshold_ratio=vad_ratio,
+            trailing_silence=trailing_silence,
+            echo_ratio=echo_ratio,
+        )
+        # Always-open microphone; listen() starts `preroll` seconds in the past
+        self.mic = mic if mic is not None else MicRingBuffer(
+            samplerate=self.samplerate, blocksize=self.vad.frame)
+        self.preroll = preroll
+        # Pre-roll usually overlaps the end of our own prompt (the mic hears
+        # the speakers); those samples, plus `echo_guard` seconds of room
+        # reverb, are held to a raised VAD and gate threshold
+        self.engine = engine if engine is not None else default_engine
+        self.echo_guard = echo_guard
+        self._echo_samples = 0   # leading capture samples recorded during playback
+        # Capture and upload buffers, reused by every listen() call
+        self._pcm = np.zeros(int(30 * self.samplerate), dtype=np.int16)
+        self._upload = io.BytesIO()
+        self.last_stats = {}
+        # Silence gate: ambient level measured by calibrate() at session start
+        self.calibrated_floor: float | None = None
+        self.gate_ratio = 2.0
+        self.transcriptions = 0
+        self.skipped_transcriptions = 0
+        # Streaming mode: transcribe overlapping windows while the person talks
+        self.streaming = streaming
+        self.partial_hop = partial_hop
+        self.partial_window = partial_window
+        self.partial_transcriptions = 0
+        self._merger = TranscriptMerger()
+        self._listeners = []
+
+    def subscribe(self, callback):
+        """Call `callback(TranscriptEvent)` for every partial and final transcript."""
+        self._listeners.append(callback)
+
+    def _emit(self, event: TranscriptEvent):
+        for callback in self._listeners:
+            try:
+                callback(event)
+            except Exception as e:
+                print(f"[STT] Transcript listener failed: {e}")
+
+    def request_early_endpoint(self, trailing_silence: float = 0.3):
+        """Let the current capture end after a shorter pause (e.g. a command was heard)."""
+        self.vad.endpoint_silence = min(self.vad.endpoint_silence, trailing_silence)
 
     def _clean_transcription(self, text: str) -> str:
         """Clean up the transcription text."""
@@ -33,35 +105,210 @@ class STTService:
         
         return text
 
+    def _ensure_capacity(self, seconds: float) -> np.ndarray:
+        needed = int((seconds + self.preroll) * self.samplerate) + self.vad.frame
+        if len(self._pcm) < needed:
+            self._pcm = np.zeros(needed, dtype=np.int16)
+        return self._pcm
+
+    async def _capture(self, timeout: float) -> np.ndarray:
+        """
+        Read microphone audio from the ring buffer until the speaker stops.
+        Capture starts `preroll` seconds before the call, so a question begun
+        while the prompt is still playing keeps its first syllable; samples
+        from while our audio was audible only count as speech well above the
+        prompt's echo. Ends after the VAD's
+        trailing silence, after `start_timeout` with no speech, or at
+        `timeout` (a hard ceiling), whichever comes first.
+
+        Returns a view into the reused capture buffer; it is only valid
+        until the next call.
+        """
+        self.mic.start()
+        pcm = self._ensure_capacity(timeout)
+        pos = max(self.mic.position - int(self.preroll * self.samplerate), self.mic.oldest)
+        # Capture offset where our prompt (and its reverb) stops being audible
+        echo_left = self.engine.audible_until + self.echo_guard - time.monotonic()
+        echo_end = max(0, self.mic.position + int(echo_left * self.samplerate) - pos)
+        self._echo_samples = 0
+        end = 0
+
+        self.vad.reset()
+        self._merger.reset()
+        partial_task = None
+        speech_at = None       # capture offset where speech was first detected
+        last_partial = 0       # capture offset of the last partial window's end
+        hop = int(self.partial_hop * self.samplerate)
+        start = time.monotonic()
+        deadline = start + timeout
+        try:
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or end >= len(pcm):
+                    reason = "timeout"
+                    break
+                if not await self.mic.wait_for(pos + 1, timeout=remaining):
+                    reason = "timeout"
+                    break
+                n = self.mic.read_into(pcm[end:], pos, self.mic.position)
+                block = pcm[end:end + n]
+                cut = min(max(echo_end - end, 0), n)
+                self._echo_samples = min(echo_end, end + n)
+                pos += n
+                end += n
+                if cut:
+                    self.vad.process(block[:cut], echo=True)
+                if self.vad.process(block[cut:]):
+                    reason = "end of speech"
+                    break
+                if (not self.vad.speech_started and self.start_timeout is not None
+                        and time.monotonic() - start >= self.start_timeout):
+                    reason = "no speech"
+                    break
+
+                # Streaming: one overlapping window in flight at a time
+                if not (self.streaming and self.vad.speech_started):
+                    continue
+                if speech_at is None:
+                    onset = self.vad.start_frames * self.vad.frame + int(0.3 * self.samplerate)
+                    speech_at = max(0, end - onset)
+                if end - last_partial >= hop and (partial_task is None or partial_task.done()):
+                    window_start = max(speech_at, end - int(self.partial_window * self.samplerate))
+                    partial_task = asyncio.create_task(
+                        self._transcribe_partial(pcm[window_start:end].copy()))
+                    last_partial = end
+        finally:
+            if partial_task is not None:
+                partial_task.cancel()
+        print(f"[STT] Captured {end / self.samplerate:.1f}s ({reason})")
+        return pcm[:end]
+
+    async def calibrate(self, seconds: float = 1.0) -> float:
+        """
+        Measure the room's ambient level (call while nobody is speaking).
+        Seeds the VAD noise floor and the silence gate used by listen(), and
+        loads the VAD kernel in a worker thread while the room is sampled.
+        """
+        self.mic.start()
+        warming = asyncio.create_task(asyncio.to_thread(warm_kernel, self.vad.frame))
+        total = int(seconds * self.samplerate)
+        pcm = self._ensure_capacity(seconds)
+        start = self.mic.position
+        await self.mic.wait_for(start + total)
+        await warming
+        self.mic.read_into(pcm, start, start + total)
+
+        x = pcm[:total].astype(np.float32) * (1.0 / 32768)
+        usable = len(x) - len(x) % self.vad.frame
+        rms = np.sqrt((x[:usable].reshape(-1, self.vad.frame) ** 2).mean(axis=1))
+        # Low percentile so a cough during calibration does not raise the floor
+        floor = max(float(np.percentile(rms, 20)), self.vad.min_rms / self.vad.threshold_ratio)
+        self.calibrated_floor = floor
+        self.vad.noise_floor = floor
+        print(f"[STT] Calibrated noise floor: {floor:.5f} RMS")
+        return floor
+
+    def _is_silent(self, pcm: np.ndarray) -> bool:
+        """
+        True if the capture holds nothing worth sending to Whisper. Without
+        VAD speech, the part recorded during playback is only our own echo.
+        """
+        if self.vad.speech_started:
+            return False
+        pcm = pcm[self._echo_samples:]
+        if not len(pcm):
+            return True
+        floor = self.calibrated_floor if self.calibrated_floor is not None else self.vad.noise_floor
+        if floor is None:
+            return False
+        x = pcm.astype(np.float32) * (1.0 / 32768)
+        rms = float(np.sqrt(np.mean(x * x)))
+        peak = float(np.max(np.abs(x)))
+        return rms < floor * self.gate_ratio and peak < self.vad.threshold * self.gate_ratio
+
+    def _encode(self, pcm: np.ndarray, buf: io.BytesIO | None = None) -> tuple[io.BytesIO, int]:
+        """
+        Encode int16 PCM with the configured codec into an in-memory upload
+        buffer (the reused one unless `buf` is given). Runs in a worker thread.
+
+        Returns:
+            (buffer positioned at 0, encoded size in bytes)
+        """
+        import soundfile as sf
+        fmt, subtype, _ = UPLOAD_CODECS[self.upload_codec]
+        buf = buf if buf is not None else self._upload
+        buf.seek(0)
+        buf.truncate()
+        sf.write(buf, pcm, self.samplerate, format=fmt, subtype=subtype)
+        size = buf.seek(0, io.SEEK_END)  # FLAC rewrites its header, so tell() is not the size
+        buf.seek(0)
+        return buf, size
+
+    async def _transcribe_partial(self, pcm: np.ndarray):
+        """Transcribe one overlapping window and publish the merged partial."""
+        try:
+            # Own buffer: the shared one may be encoding the final upload
+            upload, _ = await asyncio.to_thread(self._encode, pcm, io.BytesIO())
+            resp = await self.client.audio.transcriptions.create(
+                model="whisper-1",
+                file=(UPLOAD_CODECS[self.upload_codec][2], upload),
+                response_format="text",
+                timeout=self.timeout,
+            )
+        except Exception as e:
+            # Partials are best effort; the final transcription still runs
+            print(f"[STT] Partial transcription failed: {e}")
+            return
+        self.partial_transcriptions += 1
+        event = self._merger.update(self._clean_transcription(resp))
+        print(f"[STT] Partial: {event.text!r} (stable: {event.stable!r})")
+        self._emit(event)
+
     async def listen(self, timeout: float) -> str:
         # 1) Record audio
-        filename = tempfile.NamedTemporaryFile(suffix=".wav", delete=False).name
-        print(f"[STT] Recording {timeout}s to {filename}…")
-        recording = sd.rec(int(timeout * self.samplerate),
-                         samplerate=self.samplerate,
-                         channels=self.channels)
-        sd.wait()
-        sf.write(filename, recording, self.samplerate)
-        print(f"[STT] Saved recording to {filename}")
-
-        # 2) Transcribe via OpenAI's new Audio API
+        print(f"[STT] Listening (up to {timeout}s)…")
+        recording = await self._capture(timeout)
+        captured = len(recording)
+        if self._is_silent(recording):
+            self.skipped_transcriptions += 1
+            print(f"[STT] No speech; skipped transcription "
+                  f"({self.skipped_transcriptions} API calls avoided)")
+            return ""
+        self.transcriptions += 1
+        if self.trim_silence:
+            bounds = self.vad.speech_bounds(recording, echo_samples=self._echo_samples)
+            if bounds is not None:
+                recording = recording[bounds[0]:bounds[1]]
+
+        # 2) Compress off the event loop
+        encode_start = time.perf_counter()
+        upload, size = await asyncio.to_thread(self._encode, recording)
+        encode_ms = (time.perf_counter() - encode_start) * 1000
+
+        # 3) Transcribe via OpenAI's new Audio API, straight from memory
         print("[STT] Transcribing audio…")
-        with open(filename, "rb") as f:
-            resp = openai.audio.transcriptions.create(
-                model="whisper-1",
-                file=f,
-                response_format="text"
-            )
+        request_start = time.perf_counter()
+        resp = await self.client.audio.transcriptions.create(
+            model="whisper-1",
+            file=(UPLOAD_CODECS[self.upload_codec][2], upload),
+            response_format="text",
+            timeout=self.timeout,
+        )
+        self.last_stats = {
+            "codec": self.upload_codec,
+            "captured_seconds": round(captured / self.samplerate, 2),
+            "uploaded_seconds": round(len(recording) / self.samplerate, 2),
+            "raw_bytes": recording.nbytes,
+            "upload_bytes": size,
+            "encode_ms": round(encode_ms, 1),
+            "transcribe_seconds": round(time.perf_counter() - request_start, 2),
+        }
+        print(f"[STT] Upload stats: {self.last_stats}")
         
         # Clean up the transcription
         text = self._clean_transcription(resp)
         print(f"[STT] Raw transcription: {resp!r}")
         print(f"[STT] Cleaned transcription: {text!r}")
-        
-        # Clean up the temporary file
-        try:
-            os.unlink(filename)
-        except:
-            pass
+        self._emit(TranscriptEvent(FINAL, text, text))
             
-        return text
\ No newline at end of file
+        return text
@@ -0,0 +1,18 @@
+# test_audio_engine.py
+import asyncio
+import numpy as np
+from audio_engine import engine
+from audio_cue import play_chime
+
+async def main():
+    engine.start()
+    print("Engine:", engine.stats())
+    # Half a second of 440 Hz, then the chime, through the same open stream
+    t = np.arange(engine.samplerate // 2) / engine.samplerate
+    tone = (0.2 * np.sin(2 * np.pi * 440 * t) * 32767).astype("<i2").tobytes()
+    await engine.play(tone, label="tone").wait()
+    await play_chime()
+    engine.close()
+
+if __name__ == "__main__":
+    asyncio.run(main())
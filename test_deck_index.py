@@ -0,0 +1,60 @@
+# test_deck_index.py
+from deck_index import DeckIndex, build_record
+
+def _text(*runs):
+    return {"textElements": [{"paragraphMarker": {}}] + [{"textRun": {"content": r}} for r in runs]}
+
+def _shape(*runs, placeholder=None, object_id=None):
+    shape = {"text": _text(*runs)}
+    if placeholder:
+        shape["placeholder"] = {"type": placeholder}
+    return {"objectId": object_id, "shape": shape}
+
+SLIDE = {
+    "objectId": "p1",
+    "pageElements": [
+        _shape("Quarterly ", "results\n", placeholder="TITLE"),
+        _shape("Revenue grew\n", "Costs   fell\n"),
+        {"elementGroup": {"children": [
+            _shape("Grouped caption\n"),
+            {"elementGroup": {"children": [_shape("Nested\n")]}},
+        ]}},
+        {"table": {"tableRows": [
+            {"tableCells": [{"text": _text("Region\n")}, {"text": _text("Sales\n")}]},
+            {"tableCells": [{"text": _text("EMEA\n")}, {"text": _text("42\n")}]},
+        ]}},
+    ],
+    "slideProperties": {"notesPage": {
+        "notesProperties": {"speakerNotesObjectId": "n1"},
+        "pageElements": [
+            _shape("Slide thumbnail text\n", object_id="thumb"),
+            _shape("Talk about\n", "the  numbers.\n", object_id="n1"),
+        ],
+    }},
+}
+
+def test_build_record_walks_groups_tables_and_notes():
+    record = build_record(3, SLIDE)
+    assert record.index == 3 and record.object_id == "p1"
+    assert record.title == "Quarterly results"
+    assert record.paragraphs == (
+        "Revenue grew", "Costs fell", "Grouped caption", "Nested",
+        "Region | Sales", "EMEA | 42",
+    )
+    assert record.notes == "Talk about the numbers."
+    assert record.context.startswith("Quarterly results\n\nRevenue grew")
+    assert record.context.endswith("Speaker notes:\nTalk about the numbers.")
+
+def test_index_lookup_and_search():
+    other = {"objectId": "p2", "pageElements": [_shape("Hiring plan\n", placeholder="CENTERED_TITLE")]}
+    index = DeckIndex([build_record(1, SLIDE), build_record(2, other)])
+    assert index.notes_by_slide == {1: "Talk about the numbers."}
+    assert index.by_object_id["p2"].title == "Hiring plan"
+    assert [r.index for r, _ in index.search("emea sales")] == [1]
+    assert index.search("hiring")[0][0].index == 2
+    assert index.search("unrelated") == []
+
+if __name__ == "__main__":
+    test_build_record_walks_groups_tables_and_notes()
+    test_index_lookup_and_search()
+    print("Deck index works!")
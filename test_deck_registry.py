@@ -0,0 +1,78 @@
+# test_deck_registry.py
+import time
+import asyncio
+import deck_registry
+from deck_registry import DeckRegistry
+from slides_service import SlidesService
+
+DECK_A = "a" * 44
+DECK_B = "b" * 44
+DECK_C = "c" * 44
+
+def _deck(prefix: str, notes: list[str]) -> dict:
+    return {"revisionId": "r1", "slides": [
+        {"objectId": f"{prefix}{i}", "slideProperties": {"notesPage": {"pageElements": [
+            {"shape": {"text": {"textElements": [{"textRun": {"content": text}}]}}}]}}}
+        for i, text in enumerate(notes, start=1)
+    ]}
+
+def test_decks_are_isolated_loaded_once_and_evicted_lru(monkeypatch, tmp_path):
+    fetches = []
+
+    async def fake_load(self):
+        fetches.append(self.presentation_id)
+        await asyncio.sleep(0.01)
+        self._apply(_deck(self.presentation_id[0], [f"{self.presentation_id[0]} notes"] * 2))
+        return self.notes_by_slide
+
+    monkeypatch.setattr(deck_registry, "ServiceAccountToken", lambda *a, **k: object())
+    monkeypatch.setattr(SlidesService, "load", fake_load)
+
+    async def main():
+        registry = DeckRegistry("creds.json", snapshot_dir=None, max_decks=2, sync_interval=None)
+        a1, a2, b = await asyncio.gather(
+            registry.get(DECK_A),
+            registry.get(f"https://docs.google.com/presentation/d/{DECK_A}/edit"),
+            registry.get(DECK_B),
+        )
+        assert a1 is a2 and fetches.count(DECK_A) == 1
+
+        # Separate mappings and notes per deck: A's IDs mean nothing to B
+        assert a1.mapping.update_current_slide("a2") == 2
+        assert b.mapping.update_current_slide("a2") is None
+        assert b.mapping.update_current_slide("b2") == 2
+        assert b.load_all_notes()[1] == "b notes"
+
+        await registry.get(DECK_A)        # A is now most recently used
+        await registry.get(DECK_C)        # over max_decks: B is unloaded
+        assert DECK_B not in registry and DECK_A in registry and DECK_C in registry
+        assert registry.stats()["unloads"] == 1
+
+    asyncio.run(main())
+
+def test_concurrent_loads_share_one_token(monkeypatch):
+    tokens = []
+
+    def slow_token(*args, **kwargs):
+        time.sleep(0.05)  # reading the key file and token cache
+        tokens.append(object())
+        return tokens[-1]
+
+    async def fake_load(self):
+        self._apply(_deck("s", ["notes"]))
+        return self.notes_by_slide
+
+    monkeypatch.setattr(deck_registry, "ServiceAccountToken", slow_token)
+    monkeypatch.setattr(SlidesService, "load", fake_load)
+
+    async def main():
+        registry = DeckRegistry("creds.json", snapshot_dir=None, sync_interval=None)
+        decks = await registry.preload([DECK_A, DECK_B, DECK_C])
+        assert len(tokens) == 1
+        assert all(deck.auth is tokens[0] for deck in decks)
+
+    asyncio.run(main())
+
+if __name__ == "__main__":
+    import pytest
+    raise SystemExit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,11 @@
+# test_import_budget.py
+from import_report import ENTRY_POINTS, BUDGET_MS, cold_import_ms
+
+def test_entry_points_import_within_budget():
+    timings = {module: cold_import_ms(module) for module in ENTRY_POINTS}
+    over = {m: round(ms) for m, ms in timings.items() if ms > BUDGET_MS[m]}
+    assert not over, f"Cold import over budget (ms): {over}; see `python import_report.py`"
+
+if __name__ == "__main__":
+    test_entry_points_import_within_budget()
+    print("Entry-point import times are within budget!")
@@ -0,0 +1,43 @@
+# test_intent_router.py
+from intent_router import IntentRouter, DECLINE, REPEAT, NEXT, BACK, LOUDER, SLOWER
+
+def test_classify_commands():
+    router = IntentRouter()
+    expected = {
+        "nah i'm good": DECLINE,
+        "no thanks": DECLINE,
+        "can you repeat that": REPEAT,
+        "next slide": NEXT,
+        "go back": BACK,
+        "louder please": LOUDER,
+        "slow down": SLOWER,
+        # Courtesy and preamble around the command
+        "no questions thanks": DECLINE,
+        "nope i'm good thanks": DECLINE,
+        "no thank you i'm good": DECLINE,
+        "no i don't have any questions": DECLINE,
+        "that's all thanks": DECLINE,
+        "can you speak up": LOUDER,
+        "could you slow down": SLOWER,
+        "can you go back": BACK,
+        "sorry can you repeat that": REPEAT,
+    }
+    for text, intent in expected.items():
+        result = router.classify(text)
+        assert result is not None and result.name == intent, f"{text!r} → {result}"
+
+def test_questions_pass_through():
+    router = IntentRouter()
+    for text in ["what does this chart mean",
+                 "can you go back to the revenue numbers",
+                 "what is the next step",
+                 # Command phrases inside a longer question
+                 "what did you say about costs",
+                 "is that all",
+                 "that's it right"]:
+        assert router.classify(text) is None, text
+
+if __name__ == "__main__":
+    test_classify_commands()
+    test_questions_pass_through()
+    print("IntentRouter works!")
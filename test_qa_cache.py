@@ -0,0 +1,39 @@
+# test_qa_cache.py
+from qa_cache import AnswerCache
+
+CONTEXT = "Slide 3: quarterly revenue chart, Q3 is the peak."
+
+def test_near_identical_questions_hit():
+    cache = AnswerCache()
+    cache.put("what does this chart mean", CONTEXT, "Revenue peaks in Q3.")
+    assert cache.get("what does this chart mean", CONTEXT) == "Revenue peaks in Q3."
+    assert cache.get("um what does the chart mean", CONTEXT) == "Revenue peaks in Q3."
+    assert cache.get("what does this chart mean", "another slide") is None
+    assert cache.stats()["fuzzy_hits"] == 1
+
+def test_near_miss_questions_do_not_hit():
+    cache = AnswerCache()
+    cache.put("what was revenue in 2023", CONTEXT, "Ten million.")
+    cache.put("who is on the team", CONTEXT, "Ana and Raj.")
+    cache.put("what does the chart show", CONTEXT, "Quarterly revenue.")
+    for question in [
+        "what was revenue in 2024",       # different number
+        "what was revenue",               # number dropped
+        "who is not on the team",         # negation added
+        "who isn't on the team",
+        "what does the chart mean",       # different verb, different question
+    ]:
+        assert cache.get(question, CONTEXT) is None, question
+    assert cache.stats()["misses"] == 5
+
+def test_invalidate_context_drops_answers():
+    cache = AnswerCache()
+    cache.put("what does this chart mean", CONTEXT, "Revenue peaks in Q3.")
+    assert cache.invalidate_context(CONTEXT) == 1
+    assert cache.get("what does this chart mean", CONTEXT) is None
+
+if __name__ == "__main__":
+    test_near_identical_questions_hit()
+    test_near_miss_questions_do_not_hit()
+    test_invalidate_context_drops_answers()
+    print("Answer cache works!")
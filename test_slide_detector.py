@@ -0,0 +1,88 @@
+# test_slide_detector.py
+import asyncio
+from slide_detector import CoalescingSlideQueue
+
+DEBOUNCE = 0.05
+
+async def _drain(queue: CoalescingSlideQueue, wait: float = 0.2) -> list[tuple[str, str]]:
+    """Every event the queue releases within `wait` seconds."""
+    events = []
+    try:
+        while True:
+            events.append(await asyncio.wait_for(queue.get_event(), wait))
+    except asyncio.TimeoutError:
+        return events
+
+def test_rapid_events_coalesce_to_the_last():
+    async def main():
+        queue = CoalescingSlideQueue(debounce=DEBOUNCE)
+        for i in range(10):
+            queue.put_nowait(f"s{i}")
+        assert queue.qsize() == 1
+        assert await _drain(queue) == [("default", "s9")]
+        assert queue.empty()
+    asyncio.run(main())
+
+def test_interleaved_sessions_are_independent():
+    async def main():
+        queue = CoalescingSlideQueue(debounce=DEBOUNCE)
+        queue.put_nowait("a1", "deck-a")
+        queue.put_nowait("b1", "deck-b")
+        queue.put_nowait("a2", "deck-a")
+        queue.put_nowait("b2", "deck-b")
+        assert queue.qsize() == 2
+        assert sorted(await _drain(queue)) == [("deck-a", "a2"), ("deck-b", "b2")]
+    asyncio.run(main())
+
+def test_return_to_delivered_slide_within_window_is_dropped():
+    async def main():
+        queue = CoalescingSlideQueue(debounce=DEBOUNCE)
+        queue.put_nowait("A")
+        assert await _drain(queue) == [("default", "A")]
+        # A → B → A faster than the debounce: the presenter never left A
+        queue.put_nowait("B")
+        queue.put_nowait("A")
+        assert await _drain(queue) == []
+        # Going somewhere else afterwards is delivered normally
+        queue.put_nowait("B")
+        assert await _drain(queue) == [("default", "B")]
+    asyncio.run(main())
+
+def test_requeue_redelivers_unless_session_moved_on():
+    async def main():
+        queue = CoalescingSlideQueue(debounce=DEBOUNCE)
+        queue.put_nowait("A")
+        assert await _drain(queue) == [("default", "A")]
+        assert queue.requeue("A")
+        assert await _drain(queue) == [("default", "A")]
+        queue.put_nowait("B")
+        assert not queue.requeue("A")
+        assert await _drain(queue) == [("default", "B")]
+    asyncio.run(main())
+
+def test_stats_count_every_event():
+    async def main():
+        queue = CoalescingSlideQueue(debounce=DEBOUNCE)
+        for slide in ["s1", "s2", "s3"]:
+            queue.put_nowait(slide)
+        assert queue.stats()["pending"] == 1
+        await _drain(queue)
+        queue.put_nowait("s3")
+        await _drain(queue)
+        assert queue.stats() == {
+            "received": 4,
+            "delivered": 1,
+            "coalesced": 2,
+            "dropped": 1,
+            "requeued": 0,
+            "pending": 0,
+        }
+    asyncio.run(main())
+
+if __name__ == "__main__":
+    test_rapid_events_coalesce_to_the_last()
+    test_interleaved_sessions_are_independent()
+    test_return_to_delivered_slide_within_window_is_dropped()
+    test_requeue_redelivers_unless_session_moved_on()
+    test_stats_count_every_event()
+    print("Slide queue works!")
@@ -0,0 +1,84 @@
+# test_slides_service.py
+import time
+import asyncio
+from slides_service import SlidesService
+
+def _deck(revision: str, ids: list[str]) -> dict:
+    return {"revisionId": revision, "slides": [
+        {"objectId": oid, "slideProperties": {"notesPage": {"pageElements": [
+            {"shape": {"text": {"textElements": [{"textRun": {"content": f"notes {oid}"}}]}}}]}}}
+        for oid in ids
+    ]}
+
+def test_unknown_slide_refetches_once_and_caches_misses():
+    svc = SlidesService("creds.json", "p" * 44, snapshot_dir=None)
+    svc._apply(_deck("r1", ["s1", "s2"]))
+    remote = {"deck": _deck("r2", ["s1", "new", "s2"])}
+    calls = {"revision": 0, "deck": 0}
+
+    def fetch_revision():
+        calls["revision"] += 1
+        time.sleep(0.05)
+        return remote["deck"]["revisionId"]
+
+    def fetch():
+        calls["deck"] += 1
+        return remote["deck"]
+
+    svc._fetch_revision = fetch_revision
+    svc._fetch = fetch
+
+    async def main():
+        # A burst of events for a slide added after startup → one refetch
+        results = await asyncio.gather(*(svc.resolve("new") for _ in range(5)))
+        assert results == [2] * 5
+        assert calls == {"revision": 1, "deck": 1}
+        assert svc.record(3).notes == "notes s2"
+
+        # Known IDs never touch the API
+        assert await svc.resolve("s2") == 3
+        assert calls == {"revision": 1, "deck": 1}
+
+        # A bogus ID is looked up once, then answered from the negative cache
+        assert await svc.resolve("bogus") is None
+        assert await svc.resolve("bogus") is None
+        assert calls["revision"] == 2 and svc.lookups["negative_hits"] == 1
+
+    asyncio.run(main())
+
+def test_timed_out_lookup_leaves_its_refetch_to_await():
+    svc = SlidesService("creds.json", "p" * 44, snapshot_dir=None)
+    svc._apply(_deck("r1", ["s1"]))
+    calls = {"revision": 0}
+
+    def fetch_revision():
+        calls["revision"] += 1
+        time.sleep(0.2)
+        return "r2"
+
+    svc._fetch_revision = fetch_revision
+    svc._fetch = lambda: _deck("r2", ["s1", "new"])
+
+    async def main():
+        assert await svc.resolve("new", timeout=0.01) is None
+        refetch = svc.pending_sync
+        assert refetch is not None
+        await asyncio.shield(refetch)
+        assert svc.pending_sync is None
+        assert await svc.resolve("new") == 2
+        assert calls["revision"] == 1
+
+    asyncio.run(main())
+
+def test_unknown_slide_does_not_move_current_slide():
+    svc = SlidesService("creds.json", "p" * 44, snapshot_dir=None)
+    svc._apply(_deck("r1", ["s1", "s2"]))
+    assert svc.mapping.update_current_slide("s2") == 2
+    assert svc.mapping.update_current_slide("missing") is None
+    assert svc.mapping.current_slide_index == 2
+
+if __name__ == "__main__":
+    test_unknown_slide_refetches_once_and_caches_misses()
+    test_timed_out_lookup_leaves_its_refetch_to_await()
+    test_unknown_slide_does_not_move_current_slide()
+    print("Slide lookup works!")
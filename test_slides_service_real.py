@@ -1,5 +1,5 @@
 # test_slides_service_real.py
-# test_slides_service_real.py
+import asyncio
 from slides_service import SlidesService
 
 def test_load_notes():
@@ -7,7 +7,7 @@ def test_load_notes():
         "google_credentials.json",
         "https://docs.google.com/presentation/d/1xuummHZlSFguhZowJOneJqxI_ydYGBULOgdqWubVqb4/edit"
     )
-    notes = svc.load_all_notes()
+    notes = asyncio.run(svc.load())
     # Verify we got at least slide 1
     assert 1 in notes, "Slide 1 not found in notes_by_slide"
     # Verify that the notes text is non-empty
@@ -0,0 +1,31 @@
+# test_stream_transcript.py
+from stream_transcript import TranscriptMerger
+
+def test_local_agreement():
+    merger = TranscriptMerger()
+    merger.update("what does")
+    event = merger.update("what does this chart")
+    assert event.stable == "what does"
+    event = merger.update("what does this chart mean")
+    assert event.stable == "what does this chart"
+    assert event.text == "what does this chart mean"
+
+def test_sliding_window_overlap():
+    merger = TranscriptMerger()
+    merger.update("what does this chart")
+    merger.update("what does this chart mean")
+    event = merger.update("this chart mean for sales")
+    assert event.text == "what does this chart mean for sales"
+
+def test_unaligned_hypothesis_is_ignored():
+    merger = TranscriptMerger()
+    merger.update("what does this")
+    merger.update("what does this chart")
+    event = merger.update("completely different words")
+    assert event.text == "what does this chart"
+
+if __name__ == "__main__":
+    test_local_agreement()
+    test_sliding_window_overlap()
+    test_unaligned_hypothesis_is_ignored()
+    print("TranscriptMerger works!")
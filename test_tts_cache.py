@@ -0,0 +1,67 @@
+# test_tts_cache.py
+import os
+from tts_cache import TTSAudioCache
+
+def _clip(n: int, fill: bytes = b"a") -> bytes:
+    return fill * n
+
+def test_key_depends_on_every_setting():
+    base = TTSAudioCache.key("voice", "model", "pcm_24000", "Hello.")
+    assert base == TTSAudioCache.key("voice", "model", "pcm_24000", "Hello.")
+    assert base != TTSAudioCache.key("voice", "model", "pcm_24000", "Hello!")
+    assert base != TTSAudioCache.key("other", "model", "pcm_24000", "Hello.")
+    assert base != TTSAudioCache.key("voice", "model", "pcm_24000", "Hello.", "speed=0.90")
+
+def test_memory_tier_is_a_byte_bounded_lru(tmp_path):
+    cache = TTSAudioCache(str(tmp_path), memory_bytes=250, disk_bytes=10_000)
+    cache.put("a", _clip(100))
+    cache.put("b", _clip(100))
+    assert cache.get("a") == _clip(100)      # a is now most recently used
+    cache.put("c", _clip(100))               # over 250 bytes: b leaves memory
+    assert list(cache._memory) == ["a", "c"]
+    assert cache.stats()["memory_bytes"] == 200
+    # b is still on disk and comes back into memory on a hit
+    assert cache.get("b") == _clip(100)
+    assert cache.stats()["hits_disk"] == 1 and cache.stats()["hits_memory"] == 1
+
+def test_disk_tier_is_capped_and_evicts_least_recent(tmp_path):
+    cache = TTSAudioCache(str(tmp_path), memory_bytes=0, disk_bytes=250)
+    cache.put("a", _clip(100))
+    cache.put("b", _clip(100))
+    cache.get("a")
+    cache.put("c", _clip(100))
+    assert "b" not in cache and "a" in cache and "c" in cache
+    assert not (tmp_path / "b.audio").exists()
+    assert cache.stats()["disk_bytes"] == 200
+
+def test_oversized_clip_does_not_flush_the_disk(tmp_path):
+    cache = TTSAudioCache(str(tmp_path), memory_bytes=0, disk_bytes=250)
+    cache.put("a", _clip(100))
+    cache.put("huge", _clip(1000))
+    assert "a" in cache and "huge" not in cache
+    assert not (tmp_path / "huge.audio").exists()
+
+def test_restart_restores_lru_order_from_mtimes(tmp_path):
+    cache = TTSAudioCache(str(tmp_path), memory_bytes=0, disk_bytes=10_000)
+    for i, key in enumerate(["a", "b", "c"]):
+        cache.put(key, _clip(100))
+        os.utime(tmp_path / f"{key}.audio", (1000 + i, 1000 + i))
+    os.utime(tmp_path / "a.audio", (2000, 2000))   # a was used last
+
+    # Reopening with a smaller cap evicts the least recently used file
+    reopened = TTSAudioCache(str(tmp_path), memory_bytes=0, disk_bytes=250)
+    assert list(reopened._disk) == ["c", "a"]
+    assert reopened.get("a") == _clip(100)
+    assert not (tmp_path / "b.audio").exists()
+
+def test_discard_drops_both_tiers(tmp_path):
+    cache = TTSAudioCache(str(tmp_path))
+    cache.put("a", _clip(100))
+    cache.discard("a")
+    assert "a" not in cache and cache.get("a") is None
+    assert not (tmp_path / "a.audio").exists()
+    assert cache.stats()["misses"] == 1
+
+if __name__ == "__main__":
+    import pytest
+    raise SystemExit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,30 @@
+# test_tts_prefetch.py
+import asyncio
+import time
+from tts_service import TTSService
+from tts_prefetch import NarrationPrefetcher
+
+async def main():
+    tts = TTSService()
+    notes = {
+        1: "This is the first slide.",
+        2: "This is the second slide.",
+        3: "This is the third slide.",
+    }
+    prefetcher = NarrationPrefetcher(tts, notes, ahead=2, behind=1)
+    prefetcher.schedule(1)
+
+    # Give the background renders time to finish, then "flip" to slide 2
+    await asyncio.sleep(5)
+    start = time.perf_counter()
+    audio = prefetcher.ready(2, notes[2])
+    if audio is None:
+        print("Slide 2 not rendered yet; streaming it instead")
+        await tts.speak(notes[2])
+    else:
+        print(f"Slide 2 audio ready in {time.perf_counter() - start:.3f}s")
+        await tts.play(audio)
+    prefetcher.close()
+
+if __name__ == "__main__":
+    asyncio.run(main())
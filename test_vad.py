@@ -0,0 +1,85 @@
+# test_vad.py
+import numpy as np
+from vad import (VoiceActivityDetector, frame_features,
+                 _frame_features_loop, _frame_features_numpy)
+
+SR = 16000
+
+def _tone(seconds: float, amplitude: float) -> np.ndarray:
+    t = np.arange(int(seconds * SR)) / SR
+    return (np.sin(2 * np.pi * 200 * t) * amplitude * np.sqrt(2)).astype(np.float32)
+
+def _silence(seconds: float, amplitude: float = 0.001) -> np.ndarray:
+    rng = np.random.default_rng(0)
+    return (rng.standard_normal(int(seconds * SR)) * amplitude).astype(np.float32)
+
+def _feed(vad: VoiceActivityDetector, x: np.ndarray, block: int = 480):
+    """Feed `x` in blocks; return the sample offset where speech ended, or None."""
+    for start in range(0, len(x), block):
+        if vad.process(x[start:start + block]):
+            return start + block
+    return None
+
+def test_kernels_agree():
+    x = np.concatenate([_silence(0.3), _tone(0.3, 0.1), _silence(0.3, 0.01)])
+    expected = _frame_features_numpy(x, 480)
+    for rms, zcr in [_frame_features_loop(x, 480), frame_features(x, 480)]:
+        assert np.allclose(rms, expected[0], rtol=1e-5)
+        assert np.allclose(zcr, expected[1])
+
+def test_endpoint_after_trailing_silence():
+    vad = VoiceActivityDetector(trailing_silence=0.6)
+    x = np.concatenate([_silence(0.5), _tone(0.5, 0.05), _silence(1.5)])
+    ended_at = _feed(vad, x)
+    assert vad.speech_started and ended_at is not None
+    # 0.5 s lead-in + 0.5 s speech + 0.6 s trailing silence, to the frame
+    assert abs(ended_at / SR - 1.6) <= 0.03
+
+def test_short_blip_does_not_start_speech():
+    vad = VoiceActivityDetector(start_frames=3)
+    # Two 30 ms frames of tone, aligned to frame boundaries
+    x = np.concatenate([_silence(0.48), _tone(0.06, 0.05), _silence(1.0)])
+    assert _feed(vad, x) is None
+    assert not vad.speech_started and vad.speech_frames == 2
+
+def test_noise_floor_drops_fast_and_rises_slowly():
+    vad = VoiceActivityDetector()
+    _feed(vad, _silence(0.5, 0.002))
+    loud_floor = vad.noise_floor
+    _feed(vad, _silence(0.1, 0.0005))
+    assert vad.noise_floor < loud_floor / 2
+    quiet_floor = vad.noise_floor
+    _feed(vad, _silence(0.1, 0.001))
+    assert quiet_floor < vad.noise_floor < 0.001
+
+def test_echo_is_held_to_a_raised_threshold():
+    vad = VoiceActivityDetector(echo_ratio=3.0)
+    _feed(vad, _silence(0.5))
+    floor = vad.noise_floor
+    echo = _tone(0.5, vad.threshold * 2)
+    assert not vad.process(echo, echo=True)
+    assert not vad.speech_started and vad.noise_floor == floor
+    # Talking over the echo still counts
+    vad.process(_tone(0.2, vad.threshold * 10), echo=True)
+    assert vad.speech_started
+
+def test_speech_bounds():
+    vad = VoiceActivityDetector()
+    _feed(vad, _silence(0.5))
+    x = np.concatenate([_silence(1.0), _tone(0.5, 0.05), _silence(1.0)])
+    start, end = vad.speech_bounds(x, pad=0.2)
+    assert abs(start / SR - 0.8) <= 0.03 and abs(end / SR - 1.7) <= 0.03
+    assert vad.speech_bounds(_silence(1.0)) is None
+    # A quiet tone inside the echo span is the prompt, not speech
+    echo = np.concatenate([_tone(0.5, vad.threshold * 2), _silence(1.0)])
+    assert vad.speech_bounds(echo) is not None
+    assert vad.speech_bounds(echo, echo_samples=int(0.5 * SR)) is None
+
+if __name__ == "__main__":
+    test_kernels_agree()
+    test_endpoint_after_trailing_silence()
+    test_short_blip_does_not_start_speech()
+    test_noise_floor_drops_fast_and_rises_slowly()
+    test_echo_is_held_to_a_raised_threshold()
+    test_speech_bounds()
+    print("VAD works!")
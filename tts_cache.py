@@ -0,0 +1,148 @@
+# tts_cache.py
+"""
+Content-addressed cache for synthesized speech.
+Two tiers: an in-memory LRU of audio bytes in front of an on-disk store with
+a size cap, both evicting least-recently-used entries first.
+"""
+import os
+import hashlib
+import logging
+from collections import OrderedDict
+
+class TTSAudioCache:
+    def __init__(self, cache_dir: str = ".tts_cache",
+                 memory_bytes: int = 32 * 1024 * 1024,
+                 disk_bytes: int = 256 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.memory_bytes = memory_bytes
+        self.disk_bytes = disk_bytes
+        self._memory: OrderedDict[str, bytes] = OrderedDict()
+        self._memory_size = 0
+        self._disk: OrderedDict[str, int] = OrderedDict()  # key → file size
+        self._disk_size = 0
+        self.hits_memory = 0
+        self.hits_disk = 0
+        self.misses = 0
+
+        os.makedirs(cache_dir, exist_ok=True)
+        self._scan_disk()
+
+    @staticmethod
+    def key(voice_id: str, model_id: str, output_format: str, text: str,
+            settings: str = "") -> str:
+        """Cache key for one utterance; any change to voice, model, format or settings misses."""
+        text_hash = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        raw = f"{voice_id}\0{model_id}\0{output_format}\0{text_hash}"
+        if settings:
+            raw += f"\0{settings}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.audio")
+
+    def _scan_disk(self):
+        """
+        Rebuild the disk LRU order from file modification times, oldest
+        first (get() touches a file on every hit, so mtime is last use).
+        """
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".audio"):
+                continue
+            try:
+                st = os.stat(os.path.join(self.cache_dir, name))
+            except OSError:
+                continue
+            entries.append((st.st_mtime, name[:-len(".audio")], st.st_size))
+        for _, key, size in sorted(entries):
+            self._disk[key] = size
+            self._disk_size += size
+        self._evict_disk()
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._memory or key in self._disk
+
+    def get(self, key: str) -> bytes | None:
+        """Return cached audio for `key`, promoting disk hits into memory."""
+        audio = self._memory.get(key)
+        if audio is not None:
+            self._memory.move_to_end(key)
+            self.hits_memory += 1
+            return audio
+
+        if key in self._disk:
+            path = self._path(key)
+            try:
+                with open(path, "rb") as f:
+                    audio = f.read()
+                os.utime(path)  # persist recency across restarts
+            except OSError:
+                self._drop_disk(key)
+            else:
+                self._disk.move_to_end(key)
+                self.hits_disk += 1
+                self._put_memory(key, audio)
+                return audio
+
+        self.misses += 1
+        return None
+
+    def put(self, key: str, audio: bytes):
+        """Store audio in both tiers (skipping a tier the clip alone would overflow)."""
+        self._put_memory(key, audio)
+        if key in self._disk or len(audio) > self.disk_bytes:
+            return
+        path = self._path(key)
+        tmp = f"{path}.tmp"
+        try:
+            with open(tmp, "wb") as f:
+                f.write(audio)
+            os.replace(tmp, path)
+        except OSError as e:
+            logging.warning(f"[TTS-CACHE] Could not write {path}: {e}")
+            return
+        self._disk[key] = len(audio)
+        self._disk_size += len(audio)
+        self._evict_disk()
+
+    def discard(self, key: str):
+        """Drop `key` from both tiers (e.g. the notes it was rendered from changed)."""
+        old = self._memory.pop(key, None)
+        if old is not None:
+            self._memory_size -= len(old)
+        if key in self._disk:
+            self._drop_disk(key)
+
+    def _put_memory(self, key: str, audio: bytes):
+        if len(audio) > self.memory_bytes:
+            return
+        old = self._memory.pop(key, None)
+        if old is not None:
+            self._memory_size -= len(old)
+        self._memory[key] = audio
+        self._memory_size += len(audio)
+        while self._memory_size > self.memory_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_size -= len(evicted)
+
+    def _drop_disk(self, key: str):
+        size = self._disk.pop(key, 0)
+        self._disk_size -= size
+        try:
+            os.unlink(self._path(key))
+        except OSError:
+            pass
+
+    def _evict_disk(self):
+        while self._disk_size > self.disk_bytes and self._disk:
+            key = next(iter(self._disk))
+            self._drop_disk(key)
+
+    def stats(self) -> dict:
+        return {
+            "hits_memory": self.hits_memory,
+            "hits_disk": self.hits_disk,
+            "misses": self.misses,
+            "memory_bytes": self._memory_size,
+            "disk_bytes": self._disk_size,
+        }
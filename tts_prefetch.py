@@ -0,0 +1,92 @@
+# tts_prefetch.py
+"""
+Lookahead narration prefetch.
+Synthesizes the speaker notes around the current slide in the background so
+that flipping to an already-rendered slide starts playback without a network
+round trip.
+"""
+import asyncio
+import logging
+
+class NarrationPrefetcher:
+    def __init__(self, tts, notes: dict[int, str], ahead: int = 2,
+                 behind: int = 1, max_concurrency: int = 2):
+        self.tts = tts
+        self.notes = notes
+        self.ahead = ahead
+        self.behind = behind
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        # slide index → (audio cache key, synthesis task); the key changes
+        # with the text and with voice settings such as speed
+        self._tasks: dict[int, tuple[str, asyncio.Task]] = {}
+
+    def window(self, index: int) -> list[int]:
+        """Slides to keep rendered, in priority order: current, next N, previous."""
+        ahead = [index + i for i in range(1, self.ahead + 1)]
+        behind = [index - i for i in range(1, self.behind + 1)]
+        return [index] + ahead + behind
+
+    def schedule(self, index: int):
+        """
+        Start synthesis for the window around `index`, drop everything else.
+        Slide `index` itself is narrated by streaming TTS, so no render is
+        started for it here; one already running or finished is kept.
+        """
+        wanted = self.window(index)
+        for idx in list(self._tasks):
+            if idx not in wanted:
+                _, task = self._tasks.pop(idx)
+                task.cancel()
+
+        for idx in wanted:
+            if idx == index and idx not in self._tasks:
+                continue
+            text = self.notes.get(idx)
+            if not text:
+                continue
+            key = self.tts.cache_key(text)
+            entry = self._tasks.get(idx)
+            if entry and entry[0] == key:
+                continue
+            if entry:
+                entry[1].cancel()
+            task = asyncio.create_task(self._render(idx, text))
+            self._tasks[idx] = (key, task)
+
+    def update_notes(self, notes: dict[int, str], changed: list[int]):
+        """Adopt a re-synced notes map; drop renders of the slides that changed."""
+        self.notes = notes
+        for idx in changed:
+            entry = self._tasks.pop(idx, None)
+            if entry:
+                entry[1].cancel()
+
+    async def _render(self, idx: int, text: str) -> bytes:
+        async with self._semaphore:
+            logging.debug(f"[PREFETCH] Rendering slide {idx}")
+            return await self.tts.synthesize(text)
+
+    def ready(self, index: int, text: str) -> bytes | None:
+        """Audio for slide `index` if its render has already finished, else None."""
+        entry = self._tasks.get(index)
+        if not entry or entry[0] != self.tts.cache_key(text):
+            return None
+        task = entry[1]
+        if not task.done() or task.cancelled():
+            return None
+        if task.exception() is not None:
+            logging.error(f"[PREFETCH] Slide {index} failed: {task.exception()}")
+            return None
+        return task.result()
+
+    def discard(self, index: int):
+        """Cancel and forget slide `index`'s render (it is being streamed instead)."""
+        entry = self._tasks.pop(index, None)
+        if entry:
+            entry[1].cancel()
+
+    def close(self):
+        """Cancel all outstanding synthesis tasks."""
+        for _, task in self._tasks.values():
+            task.cancel()
+        self._tasks.clear()
@@ -4,50 +4,199 @@ Handles conversion of text to natural-sounding speech.
 """
 # tts_service.py
 import os
+import time
 import asyncio
-import tempfile
-import subprocess
-from dotenv import load_dotenv
-from elevenlabs.client import ElevenLabs
-
-load_dotenv()
+from http_pool import get_async_client
+from config_loader import load_env
+from tts_cache import TTSAudioCache
+from audio_engine import AudioEngine, engine as default_engine
 
 class TTSService:
-    def __init__(self):
+    def __init__(self, cache: TTSAudioCache | None = None, streaming: bool = True,
+                 engine: AudioEngine | None = None, timeout: float = 30.0):
+        load_env()
         api_key = os.getenv("ELEVENLABS_API_KEY")
         if not api_key:
             raise RuntimeError("ELEVENLABS_API_KEY not set in .env")
-        self.client   = ElevenLabs(api_key=api_key)
+        from elevenlabs.client import AsyncElevenLabs
+        self.client   = AsyncElevenLabs(api_key=api_key, httpx_client=get_async_client())
+        self.timeout  = timeout
         self.voice_id = "21m00Tcm4TlvDq8ikWAM"
         self.model_id = "eleven_multilingual_v2"
+        # Raw 16-bit mono PCM can go straight to the sound card, no decoding
+        self.output_format = "pcm_24000"
+        self.samplerate = 24000
+        # Speaking rate; ElevenLabs accepts 0.7 (slow) to 1.2 (fast)
+        self.speed    = 1.0
+        self.streaming = streaming
+        self.engine   = engine if engine is not None else default_engine
+        if self.engine.samplerate != self.samplerate:
+            raise ValueError(f"Audio engine must run at {self.samplerate} Hz for {self.output_format}")
+        self.cache    = cache if cache is not None else TTSAudioCache()
 
-    async def speak(self, text: str):
-        """Generate and *play* the TTS audio."""
-        # 1) Generate the MP3 bytes
-        chunks = self.client.text_to_speech.convert(
+    def cache_key(self, text: str) -> str:
+        """Audio cache key for `text` with the current voice settings."""
+        settings = f"speed={self.speed:.2f}" if self.speed != 1.0 else ""
+        return TTSAudioCache.key(self.voice_id, self.model_id, self.output_format,
+                                 text, settings)
+
+    def forget(self, text: str):
+        """Evict cached audio for `text` (e.g. slide notes that were edited)."""
+        self.cache.discard(self.cache_key(text))
+
+    def slow_down(self, step: float = 0.1) -> float:
+        """Lower the speaking rate for everything synthesized from now on."""
+        self.speed = round(max(0.7, self.speed - step), 2)
+        return self.speed
+
+    def _convert_stream(self, text: str):
+        """Async iterator of audio chunks as they arrive from ElevenLabs."""
+        extra = {}
+        if self.speed != 1.0:
+            from elevenlabs import VoiceSettings
+            extra["voice_settings"] = VoiceSettings(speed=self.speed)
+        return self.client.text_to_speech.convert(
             text=text,
             voice_id=self.voice_id,
             model_id=self.model_id,
-            output_format="mp3_44100_128"
+            output_format=self.output_format,
+            request_options={"timeout_in_seconds": int(self.timeout)},
+            **extra,
         )
-        audio = b"".join(chunks)
 
-        # 2) Write to a temp file
-        tmp = tempfile.NamedTemporaryFile(suffix=".mp3", delete=False)
-        tmp.write(audio)
-        tmp.flush()
-        path = tmp.name
-        tmp.close()
+    async def _convert(self, text: str) -> bytes:
+        return b"".join([chunk async for chunk in self._convert_stream(text)])
+
+    async def synthesize(self, text: str) -> bytes:
+        """Generate the PCM bytes for `text` without playing them."""
+        key = self.cache_key(text)
+        audio = self.cache.get(key)
+        if audio is not None:
+            print(f"[TTS] Cache hit ({len(audio)} bytes) for: {text!r}")
+            return audio
 
+        audio = await self._convert(text)
         print(f"[TTS] Generated {len(audio)} bytes for: {text!r}")
+        self.cache.put(key, audio)
+        return audio
+
+    async def warm(self, texts: list[str]):
+        """Make sure the given phrases are cached before they are needed."""
+        results = await asyncio.gather(*(self.synthesize(t) for t in texts),
+                                       return_exceptions=True)
+        for text, result in zip(texts, results):
+            if isinstance(result, Exception):
+                print(f"[TTS] Could not warm {text!r}: {result}")
+
+    async def _stream(self, text: str, playback) -> bytes | None:
+        """
+        Feed chunks to the engine while they download.
+        Returns the full clip, or None if playback was stopped part-way.
+        """
+        collected = bytearray()
+        start = time.perf_counter()
+        stream = self._convert_stream(text)
+        try:
+            async for chunk in stream:
+                if playback.cancelled:
+                    return None
+                if not collected:
+                    print(f"[TTS] First audio after {time.perf_counter() - start:.2f}s")
+                collected += chunk
+                playback.feed(chunk)
+        finally:
+            # Closes the HTTP response early if we stopped part-way
+            await stream.aclose()
+        return bytes(collected)
+
+    async def play(self, audio: bytes):
+        """Play already-synthesized PCM bytes."""
         print("[TTS] Playing narration…")
+        playback = self.engine.play(audio, label="tts")
+        try:
+            await playback.wait()
+        except asyncio.CancelledError:
+            playback.cancel()
+            raise
 
-        # 3) Play using system player
-        # macOS: afplay, Linux: mpg123, Windows: start
-        if os.name == "posix" and subprocess.run(["which","afplay"], stdout=subprocess.DEVNULL).returncode == 0:
-            await asyncio.to_thread(subprocess.run, ["afplay", path])
-        elif os.name == "posix":
-            await asyncio.to_thread(subprocess.run, ["mpg123", path])
+    async def _render_into(self, text: str, playback, slots: asyncio.Semaphore):
+        """Fill an already-queued playback with the audio for `text`."""
+        key = self.cache_key(text)
+        audio = self.cache.get(key)
+        if audio is not None:
+            playback.feed(audio)
         else:
-            # Windows
-            await asyncio.to_thread(subprocess.run, ["powershell", "-c", f"Start-Process '{path}'"])
\ No newline at end of file
+            async with slots:
+                audio = await self._stream(text, playback)
+            if audio is not None:
+                self.cache.put(key, audio)
+        playback.close()
+
+    async def speak_stream(self, sentences, started: float | None = None,
+                           max_concurrency: int = 3) -> list[str]:
+        """
+        Speak sentences as they arrive from an async iterator (e.g. a streamed
+        LLM answer). Each sentence gets its slot in the play queue on arrival
+        and starts synthesizing right away, so playback order is preserved while
+        later sentences render behind the current one.
+
+        Returns:
+            list[str]: The sentences spoken, each cached under its own key
+        """
+        started = started if started is not None else time.perf_counter()
+        slots = asyncio.Semaphore(max_concurrency)
+        spoken, playbacks, tasks = [], [], []
+        try:
+            async for sentence in sentences:
+                spoken.append(sentence)
+                playback = self.engine.enqueue(label="tts")
+                playbacks.append(playback)
+                tasks.append(asyncio.create_task(self._render_into(sentence, playback, slots)))
+            await asyncio.gather(*tasks)
+            for playback in playbacks:
+                await playback.wait()
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            for playback in playbacks:
+                playback.cancel()
+            raise
+        if playbacks and playbacks[0].first_audio is not None:
+            print(f"[TTS] First spoken audio {playbacks[0].first_audio - started:.2f}s after request")
+        return spoken
+
+    async def replay(self, parts: list[str]):
+        """
+        Speak clips again, back to back, from their own cache entries (as
+        returned by speak_stream); only evicted ones are synthesized again.
+        """
+        async def queued():
+            for part in parts:
+                yield part
+        await self.speak_stream(queued())
+
+    async def speak(self, text: str):
+        """Generate and *play* the TTS audio."""
+        key = self.cache_key(text)
+        if not self.streaming or key in self.cache:
+            audio = await self.synthesize(text)
+            await self.play(audio)
+            return
+
+        print(f"[TTS] Streaming narration for: {text!r}")
+        playback = self.engine.enqueue(label="tts")
+        try:
+            audio = await self._stream(text, playback)
+        except BaseException:
+            playback.cancel()
+            raise
+        playback.close()
+        if audio is None:
+            return
+        print(f"[TTS] Streamed {len(audio)} bytes")
+        self.cache.put(key, audio)
+        try:
+            await playback.wait()
+        except asyncio.CancelledError:
+            playback.cancel()
+            raise
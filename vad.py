@@ -0,0 +1,177 @@
+# vad.py
+"""
+Lightweight voice-activity detection for endpointing microphone capture.
+Frames are scored by RMS energy against an adaptive noise floor, with the
+zero-crossing rate as a secondary cue so quiet fricatives ("s", "sh") are not
+mistaken for silence. Audio captured while our own speech was still audible
+is scored against a raised threshold, so the prompt's echo is not taken for a
+question but someone talking over it still is. The per-frame kernels are numba-compiled when numba is
+available and fall back to vectorized numpy otherwise.
+"""
+import numpy as np
+
+def _frame_features_numpy(x: np.ndarray, frame: int):
+    n = len(x) // frame
+    frames = x[:n * frame].reshape(n, frame).astype(np.float64)
+    rms = np.sqrt((frames * frames).mean(axis=1))
+    signs = np.signbit(frames)
+    zcr = (signs[:, 1:] != signs[:, :-1]).sum(axis=1) / frame
+    return rms, zcr
+
+def _frame_features_loop(x, frame):
+    n = len(x) // frame
+    rms = np.empty(n)
+    zcr = np.empty(n)
+    for i in range(n):
+        base = i * frame
+        total = 0.0
+        crossings = 0
+        prev_neg = x[base] < 0
+        for j in range(frame):
+            v = x[base + j]
+            total += v * v
+            neg = v < 0
+            if neg != prev_neg:
+                crossings += 1
+            prev_neg = neg
+        rms[i] = np.sqrt(total / frame)
+        zcr[i] = crossings / frame
+    return rms, zcr
+
+_kernel = None
+
+def frame_features(x: np.ndarray, frame: int):
+    """Per-frame (rms, zcr). numba is imported (and the kernel loaded) on first call."""
+    global _kernel
+    if _kernel is None:
+        try:
+            from numba import njit
+        except ImportError:  # numba is optional
+            _kernel = _frame_features_numpy
+        else:
+            _kernel = njit(cache=True)(_frame_features_loop)
+    return _kernel(x, frame)
+
+def warm_kernel(frame: int = 480):
+    """
+    Load (or JIT-compile) the frame kernel ahead of time. Blocking: run it in
+    a worker thread so the first listen() does not stall the event loop.
+    """
+    frame_features(np.zeros(frame * 2, dtype=np.float32), frame)
+
+class VoiceActivityDetector:
+    def __init__(self, samplerate: int = 16000, frame_ms: int = 30,
+                 threshold_ratio: float = 3.0, min_rms: float = 0.003,
+                 start_frames: int = 3, trailing_silence: float = 0.8,
+                 floor_adapt: float = 0.05, echo_ratio: float = 3.0):
+        self.samplerate = samplerate
+        self.frame = int(samplerate * frame_ms / 1000)
+        self.frame_seconds = self.frame / samplerate
+        self.threshold_ratio = threshold_ratio
+        self.min_rms = min_rms
+        self.start_frames = start_frames
+        self.trailing_silence = trailing_silence
+        self.floor_adapt = floor_adapt
+        # Threshold multiplier for audio recorded while playback was audible
+        self.echo_ratio = echo_ratio
+        self.noise_floor = None
+        self.reset()
+
+    def reset(self):
+        """Start a new utterance; the learned noise floor is kept."""
+        self._leftover = np.zeros(0, dtype=np.float32)
+        self._run = 0
+        self._silence = 0
+        # Trailing silence for this utterance; may be shortened mid-utterance
+        self.endpoint_silence = self.trailing_silence
+        self.speech_started = False
+        self.speech_ended = False
+        self.speech_frames = 0
+
+    @property
+    def threshold(self) -> float:
+        """Current RMS level above which a frame counts as speech."""
+        floor = self.noise_floor if self.noise_floor is not None else self.min_rms
+        return max(floor * self.threshold_ratio, self.min_rms)
+
+    def is_speech(self, rms: float, zcr: float, scale: float = 1.0) -> bool:
+        threshold = self.threshold * scale
+        if rms > threshold:
+            return True
+        # Unvoiced consonants are quiet but noisy: accept them at half the threshold
+        return rms > threshold / 2 and 0.25 <= zcr <= 0.6
+
+    def process(self, block: np.ndarray, echo: bool = False) -> bool:
+        """
+        Feed mono samples: float32 in [-1, 1] or int16 PCM. With `echo`, the
+        block was recorded while our playback was audible: the threshold is
+        raised by `echo_ratio` and the noise floor is left alone.
+
+        Returns:
+            bool: True once speech has started and been followed by the
+                  configured trailing silence
+        """
+        block = np.asarray(block).reshape(-1)
+        if block.dtype == np.int16:
+            block = block.astype(np.float32) * (1.0 / 32768)
+        x = np.concatenate([self._leftover, block.astype(np.float32, copy=False)])
+        usable = len(x) - len(x) % self.frame
+        self._leftover = x[usable:]
+        if not usable:
+            return self.speech_ended
+
+        rms, zcr = frame_features(x[:usable], self.frame)
+        scale = self.echo_ratio if echo else 1.0
+        for level, crossings in zip(rms, zcr):
+            if self.noise_floor is None:
+                self.noise_floor = max(level, self.min_rms / self.threshold_ratio)
+            if self.is_speech(level, crossings, scale):
+                self._run += 1
+                self._silence = 0
+                self.speech_frames += 1
+                if self._run >= self.start_frames:
+                    self.speech_started = True
+                continue
+
+            # Background: track the floor (drop fast, rise slowly); playback
+            # echo is not room noise
+            if not echo:
+                if level < self.noise_floor:
+                    self.noise_floor = level
+                else:
+                    self.noise_floor += self.floor_adapt * (level - self.noise_floor)
+            self._run = 0
+            if self.speech_started:
+                self._silence += 1
+                if self._silence * self.frame_seconds >= self.endpoint_silence:
+                    self.speech_ended = True
+        return self.speech_ended
+
+    def speech_bounds(self, pcm: np.ndarray, pad: float = 0.2,
+                      echo_samples: int = 0) -> tuple[int, int] | None:
+        """
+        Sample range spanning every speech-like frame in `pcm`, widened by
+        `pad` seconds on each side, using the current noise floor. The first
+        `echo_samples` are held to the raised echo threshold (see process()).
+
+        Returns:
+            (start, end): Slice bounds in samples
+            None: If no frame looks like speech
+        """
+        x = np.asarray(pcm).reshape(-1)
+        if x.dtype == np.int16:
+            x = x.astype(np.float32) * (1.0 / 32768)
+        if len(x) < self.frame:
+            return None
+        rms, zcr = frame_features(x, self.frame)
+        threshold = np.full(len(rms), self.threshold)
+        echo_frames = -(-echo_samples // self.frame)  # frames touching the echo
+        threshold[:echo_frames] *= self.echo_ratio
+        speech = (rms > threshold) | ((rms > threshold / 2) & (zcr >= 0.25) & (zcr <= 0.6))
+        frames = np.flatnonzero(speech)
+        if not len(frames):
+            return None
+        margin = int(pad * self.samplerate)
+        start = max(0, int(frames[0]) * self.frame - margin)
+        end = min(len(x), (int(frames[-1]) + 1) * self.frame + margin)
+        return start, end